@@ -0,0 +1,99 @@
+import time
+
+# --- Confidence-Driven Adaptive Decoding ---
+# Most turns are short, clean commands that greedy decoding gets right, so every utterance
+# is decoded with beam_size=1 first. Only when a segment looks unreliable (same signals
+# Whisper uses for its own temperature fallback) is it decoded again with beam search.
+
+GREEDY_BEAM_SIZE = 1
+FALLBACK_BEAM_SIZE = 5
+MIN_AVG_LOGPROB = -0.8        # Below this the greedy hypothesis is a guess
+MAX_COMPRESSION_RATIO = 2.4   # Above this the text is repetitive, i.e. probably looping
+MAX_NO_SPEECH_PROB = 0.6      # Above this Whisper thinks there was no speech at all
+
+GREEDY = "greedy"
+BEAM = "beam"
+STREAMED = "streamed"         # The last streaming partial (greedy) was reused as the final transcript
+
+
+def decode_segments(model, audio_np, beam_size):
+    # model.transcribe returns a lazy generator, list() is where the decoding actually happens
+    segments, info = model.transcribe(audio_np, beam_size=beam_size,
+                                      condition_on_previous_text=False, without_timestamps=True)
+    return list(segments)
+
+
+def segments_text(segments):
+    return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class DecodePolicy:
+    def __init__(self, min_avg_logprob=MIN_AVG_LOGPROB, max_compression_ratio=MAX_COMPRESSION_RATIO,
+                 max_no_speech_prob=MAX_NO_SPEECH_PROB, greedy_beam_size=GREEDY_BEAM_SIZE,
+                 fallback_beam_size=FALLBACK_BEAM_SIZE):
+        self.min_avg_logprob = min_avg_logprob
+        self.max_compression_ratio = max_compression_ratio
+        self.max_no_speech_prob = max_no_speech_prob
+        self.greedy_beam_size = greedy_beam_size
+        self.fallback_beam_size = fallback_beam_size
+
+    def fallback_reason(self, segments):
+        """Why a greedy result needs beam search, or None if it can be used as is."""
+        for segment in segments:
+            if segment.avg_logprob < self.min_avg_logprob:
+                return f"avg_logprob {segment.avg_logprob:.2f}"
+            if segment.compression_ratio > self.max_compression_ratio:
+                return f"compression_ratio {segment.compression_ratio:.2f}"
+            if segment.no_speech_prob > self.max_no_speech_prob:
+                return f"no_speech_prob {segment.no_speech_prob:.2f}"
+        return None
+
+    def decode(self, model, audio_np, greedy_segments=None):
+        """
+        Returns (text, path, reason). `greedy_segments` is an already available greedy
+        result for the same audio (e.g. the last streaming partial), which skips the
+        greedy pass.
+        """
+        path = STREAMED if greedy_segments is not None else GREEDY
+        if greedy_segments is None:
+            greedy_segments = decode_segments(model, audio_np, self.greedy_beam_size)
+        reason = self.fallback_reason(greedy_segments)
+        if reason is None:
+            return segments_text(greedy_segments), path, None
+        return segments_text(decode_segments(model, audio_np, self.fallback_beam_size)), BEAM, reason
+
+
+class DecodeStats:
+    # Per-turn record of which decode path was taken and what it cost
+    def __init__(self):
+        self.turns = []
+
+    def record(self, path, decode_seconds, audio_seconds, reason=None):
+        self.turns.append((path, decode_seconds, audio_seconds))
+        why = f", fallback on {reason}" if reason else ""
+        print(f"Decode: {path} in {decode_seconds:.3f} seconds for {audio_seconds:.2f} s of audio{why}")
+
+    def summary(self, baseline_seconds=None):
+        if not self.turns:
+            return "Decode: no turns."
+        counts = {}
+        for path, _, _ in self.turns:
+            counts[path] = counts.get(path, 0) + 1
+        total = sum(seconds for _, seconds, _ in self.turns)
+        audio = sum(seconds for _, _, seconds in self.turns)
+        paths = ", ".join(f"{count} {path}" for path, count in sorted(counts.items()))
+        line = (f"Decode: {len(self.turns)} turn(s) ({paths}), {total:.2f} s decoding "
+                f"for {audio:.1f} s of audio")
+        if baseline_seconds:
+            line += (f"; always beam_size={FALLBACK_BEAM_SIZE} took {baseline_seconds:.2f} s "
+                     f"({100.0 * (1 - total / baseline_seconds):.1f}% CPU saved)")
+        return line
+
+
+def timed_decode(policy, model, audio_np, stats=None, greedy_segments=None, rate=16000):
+    # policy.decode() plus a stats record for the turn
+    start = time.time()
+    text, path, reason = policy.decode(model, audio_np, greedy_segments)
+    if stats is not None:
+        stats.record(path, time.time() - start, len(audio_np) / rate, reason)
+    return text
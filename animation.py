@@ -5,13 +5,15 @@ import math
 import sys
 import random
 
-# Initialize Pygame
-pygame.init()
-
 # Screen settings
 WIDTH, HEIGHT = 800, 800
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("SAGI HUD Animation")
+SCREEN = None # Opened by init_display() from main(), importing this module doesn't open a window
+
+def init_display():
+    global SCREEN
+    pygame.init()
+    SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("SAGI HUD Animation")
 
 # Colors
 BLACK = (10, 10, 10)
@@ -79,6 +81,7 @@ def draw_text_center(surface, text, pos, font_size=32, color=WHITE):
     surface.blit(rendered, rect)
 
 def main():
+    init_display()
     running = True
     frame_count = 0
     rotation = 0
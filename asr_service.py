@@ -0,0 +1,378 @@
+# Local ASR daemon: one loaded WhisperModel per machine, shared by main.py, speechreg.py and test.py
+#
+#   python asr_service.py                 # run the daemon in the foreground
+#   python asr_service.py --status        # ask a running daemon what it is doing
+#   python asr_service.py --stop          # ask a running daemon to exit
+#
+# Front-ends talk to it over a Unix domain socket through ASRClient, which has the same
+# transcribe() call as WhisperModel, so the streaming, adaptive decode and command fast
+# path code works unchanged on either. Requests are queued per client and served
+# round-robin, so a HUD streaming partials can't starve a CLI waiting for one decode.
+# The daemon exits on its own once no front-end has been connected for IDLE_TIMEOUT, and
+# only one daemon per socket can start: the other gives up on the socket's lock file.
+
+import os
+import sys
+import json
+import time
+import socket
+import struct
+import tempfile
+import argparse
+import threading
+import subprocess
+from collections import deque
+from types import SimpleNamespace
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # No flock (Windows): startup isn't guarded against a second daemon
+
+import numpy as np
+from model_loader import ModelLoader
+from autotune import load_profile
+
+# --- Service Configuration ---
+MODEL_SIZE = "tiny.en"
+DEVICE = "cpu"
+COMPUTE_TYPE = "int8"
+CPU_THREADS = 0
+NUM_WORKERS = 1
+SOCKET_PATH = os.environ.get("SAGI_ASR_SOCKET") or os.path.join(
+    tempfile.gettempdir(), f"sagi-asr-{os.getuid() if hasattr(os, 'getuid') else 'user'}.sock")
+SPAWN_TIMEOUT = 180.0 # Seconds to wait for a freshly started daemon (first run downloads the model)
+IDLE_TIMEOUT = 600.0 # Seconds without any connected front-end before the daemon exits, 0 = never
+ACCEPT_POLL = 1.0 # How often the accept loop checks for idleness and --stop
+LOG_PATH = os.path.join(tempfile.gettempdir(), "sagi-asr.log")
+# Options a client may pass through to model.transcribe()
+TRANSCRIBE_OPTIONS = ("beam_size", "temperature", "max_new_tokens", "initial_prompt",
+                      "condition_on_previous_text", "without_timestamps")
+SEGMENT_FIELDS = ("text", "avg_logprob", "compression_ratio", "no_speech_prob")
+
+_header = struct.Struct("!II") # JSON length, payload length
+
+
+def available():
+    return hasattr(socket, "AF_UNIX")
+
+
+def send_message(sock, header, payload=b""):
+    data = json.dumps(header).encode()
+    sock.sendall(_header.pack(len(data), len(payload)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size, into=None):
+    buffer = into if into is not None else bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError("ASR service connection closed")
+        received += count
+    return buffer
+
+
+def recv_message(sock):
+    header_size, payload_size = _header.unpack(_recv_exact(sock, _header.size))
+    header = json.loads(bytes(_recv_exact(sock, header_size)))
+    payload = _recv_exact(sock, payload_size) if payload_size else None
+    return header, payload
+
+
+class FairQueue:
+    # One FIFO per client, served round-robin
+    def __init__(self):
+        self.queues = {}
+        self.order = deque()
+        self.condition = threading.Condition()
+
+    def put(self, client, item):
+        with self.condition:
+            if client not in self.queues:
+                self.queues[client] = deque()
+                self.order.append(client)
+            self.queues[client].append(item)
+            self.condition.notify()
+
+    def get(self):
+        with self.condition:
+            while not self.order:
+                self.condition.wait()
+            client = self.order.popleft()
+            queue = self.queues[client]
+            item = queue.popleft()
+            if queue:
+                self.order.append(client) # Back of the line until the other clients had a turn
+            else:
+                del self.queues[client]
+            return item
+
+    def depth(self):
+        with self.condition:
+            return {client: len(queue) for client, queue in self.queues.items()}
+
+
+class ASRServer:
+    def __init__(self, socket_path=SOCKET_PATH, model_size=MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE,
+                 cpu_threads=CPU_THREADS, num_workers=NUM_WORKERS, idle_timeout=IDLE_TIMEOUT):
+        self.socket_path = socket_path
+        self.loader = ModelLoader(model_size, device=device, compute_type=compute_type,
+                                  cpu_threads=cpu_threads, num_workers=num_workers)
+        self.requests = FairQueue()
+        self.clients = set()
+        self.served = 0
+        self.decode_seconds = 0.0
+        self.idle_timeout = idle_timeout
+        self.connections = 0 # Open front-end connections, the daemon isn't idle while there are any
+        self.last_active = time.time()
+        self.activity = threading.Lock()
+        self.stopping = threading.Event()
+
+    def _lock(self):
+        # Held for the daemon's lifetime; whoever holds it owns the socket path. Returns the
+        # open lock file, or None if another daemon holds it.
+        lock_file = open(self.socket_path + ".lock", "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return None
+        return lock_file
+
+    def serve_forever(self):
+        lock_file = self._lock()
+        if lock_file is None:
+            print(f"ASR service already running on {self.socket_path}")
+            return
+        try:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path) # Left behind by a daemon that died (a live one would hold the lock)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(self.socket_path)
+            listener.listen()
+            listener.settimeout(ACCEPT_POLL)
+            print(f"ASR service listening on {self.socket_path}")
+            # Clients can connect (and get status) while the model is still loading
+            self.loader.start()
+            threading.Thread(target=self._decode_loop, daemon=True).start()
+            try:
+                while not self.stopping.is_set():
+                    try:
+                        connection, _ = listener.accept()
+                    except socket.timeout:
+                        if self.idle_timeout and self.idle_seconds() > self.idle_timeout:
+                            print(f"ASR service idle for {self.idle_timeout:.0f} s, stopping.")
+                            break
+                        continue
+                    threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+                else:
+                    print("ASR service stopped on request.")
+            except KeyboardInterrupt:
+                print("ASR service stopping.")
+            finally:
+                listener.close()
+                os.unlink(self.socket_path)
+        finally:
+            lock_file.close()
+
+    def idle_seconds(self):
+        with self.activity:
+            return 0.0 if self.connections else time.time() - self.last_active
+
+    def _handle(self, connection):
+        client = None
+        done = threading.Event()
+        with self.activity:
+            self.connections += 1
+        try:
+            while True:
+                header, payload = recv_message(connection)
+                client = header.get("client", "anonymous")
+                self.clients.add(client)
+                if header["op"] == "ping":
+                    send_message(connection, self.status())
+                elif header["op"] == "transcribe":
+                    # Answered by the decode thread; the client waits for it before sending more
+                    done.clear()
+                    self.requests.put(client, (connection, header, payload, time.time(), done))
+                    done.wait()
+                elif header["op"] == "stop":
+                    send_message(connection, {"stopping": True})
+                    self.stopping.set() # The accept loop exits within ACCEPT_POLL
+                else:
+                    send_message(connection, {"error": f"unknown op {header['op']!r}"})
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.clients.discard(client)
+            connection.close()
+            with self.activity:
+                self.connections -= 1
+                self.last_active = time.time()
+
+    def _decode_loop(self):
+        # The only thread that touches the model
+        while True:
+            connection, header, payload, queued_at, done = self.requests.get()
+            try:
+                model = self.loader.result()
+                audio_np = np.frombuffer(payload, dtype=np.float32) if payload else np.zeros(0, np.float32)
+                options = {key: header[key] for key in TRANSCRIBE_OPTIONS if key in header}
+                start = time.time()
+                segments, info = model.transcribe(audio_np, **options)
+                segments = [{field: getattr(segment, field) for field in SEGMENT_FIELDS} for segment in segments]
+                decode_time = time.time() - start
+                self.served += 1
+                self.decode_seconds += decode_time
+                reply = {"segments": segments, "duration": info.duration,
+                         "queue_s": start - queued_at, "decode_s": decode_time}
+            except Exception as e:
+                reply = {"error": str(e)}
+            try:
+                send_message(connection, reply)
+            except OSError:
+                pass # Client went away, nothing to deliver
+            done.set()
+
+    def status(self):
+        return {"state": self.loader.state, "progress": self.loader.progress, "model": self.loader.model_size,
+                "clients": sorted(self.clients), "queued": self.requests.depth(), "served": self.served,
+                "decode_s": round(self.decode_seconds, 3),
+                "error": str(self.loader.error) if self.loader.error else None}
+
+
+class ASRClient:
+    """
+    Drop-in for WhisperModel.transcribe(): returns (segments, info), where segments carry
+    text, avg_logprob, compression_ratio and no_speech_prob. Safe to share between threads.
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH, client_name=None):
+        self.socket_path = socket_path
+        self.client = f"{client_name or os.path.basename(sys.argv[0]) or 'python'}-{os.getpid()}"
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def _request(self, header, payload=b""):
+        header["client"] = self.client
+        with self.lock:
+            for attempt in (1, 2): # Reconnect once if the daemon was restarted
+                try:
+                    if self.sock is None:
+                        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        self.sock.connect(self.socket_path)
+                    send_message(self.sock, header, payload)
+                    reply, _ = recv_message(self.sock)
+                    break
+                except (ConnectionError, OSError):
+                    self.close()
+                    if attempt == 2:
+                        raise
+        if reply.get("error"):
+            raise RuntimeError(f"ASR service: {reply['error']}")
+        return reply
+
+    def status(self):
+        return self._request({"op": "ping"})
+
+    def stop(self):
+        return self._request({"op": "stop"})
+
+    def transcribe(self, audio_np, **options):
+        audio_np = np.ascontiguousarray(audio_np, dtype=np.float32)
+        header = {"op": "transcribe"}
+        header.update((key, value) for key, value in options.items() if key in TRANSCRIBE_OPTIONS)
+        reply = self._request(header, memoryview(audio_np).cast('B'))
+        segments = [SimpleNamespace(**segment) for segment in reply["segments"]]
+        return iter(segments), SimpleNamespace(duration=reply["duration"], queue_s=reply["queue_s"],
+                                               decode_s=reply["decode_s"])
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+def ping(socket_path=SOCKET_PATH):
+    # Status dict of a running daemon, or None
+    if not available() or not os.path.exists(socket_path):
+        return None
+    try:
+        client = ASRClient(socket_path, client_name="ping")
+        try:
+            return client.status()
+        finally:
+            client.close()
+    except (OSError, RuntimeError):
+        return None
+
+
+def stop(socket_path=SOCKET_PATH):
+    # True if a running daemon was asked to exit
+    if ping(socket_path) is None:
+        return False
+    client = ASRClient(socket_path, client_name="stop")
+    try:
+        client.stop()
+        return True
+    except (OSError, RuntimeError):
+        return False
+    finally:
+        client.close()
+
+
+def connect(socket_path=SOCKET_PATH, spawn=True, timeout=SPAWN_TIMEOUT, on_status=None):
+    """
+    Returns an ASRClient once the daemon has its model loaded, starting the daemon
+    first if none is running. `on_status` gets every status poll (for progress display).
+    Raises RuntimeError if there is no daemon and it can't be started.
+    """
+    if not available():
+        raise RuntimeError("Unix domain sockets are not available on this platform")
+    status = ping(socket_path)
+    if status is None and spawn:
+        print(f"Starting ASR service (log: {LOG_PATH})...")
+        with open(LOG_PATH, "a") as log:
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), "--socket", socket_path],
+                             stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                             start_new_session=True) # Outlives the front-end that started it, until IDLE_TIMEOUT
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = ping(socket_path)
+        if status is not None:
+            if on_status:
+                on_status(status)
+            if status["state"] == "ready":
+                return ASRClient(socket_path)
+            if status["state"] == "failed":
+                raise RuntimeError(f"ASR service failed to load its model: {status['error']}")
+        time.sleep(0.2)
+    raise RuntimeError(f"ASR service not ready on {socket_path} after {timeout:.0f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared local Whisper ASR service.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix domain socket path")
+    parser.add_argument("--status", action="store_true", help="Print the status of a running service and exit")
+    parser.add_argument("--stop", action="store_true", help="Ask a running service to exit")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="Exit after this many seconds without a connected front-end (0: never)")
+    args = parser.parse_args()
+
+    if args.stop:
+        stopped = stop(args.socket)
+        print(f"ASR service on {args.socket} stopping." if stopped else f"No ASR service on {args.socket}")
+        sys.exit(0 if stopped else 1)
+    if args.status:
+        status = ping(args.socket)
+        print(json.dumps(status, indent=2) if status else f"No ASR service on {args.socket}")
+        sys.exit(0 if status else 1)
+    # The daemon is what actually loads the model, so it is the one that honours the autotune profile
+    settings = load_profile(dict(model_size=MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE,
+                                 cpu_threads=CPU_THREADS, num_workers=NUM_WORKERS))
+    ASRServer(args.socket, idle_timeout=args.idle_timeout, **settings).serve_forever()
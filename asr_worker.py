@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import threading
+import subprocess
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+from asr_service import TRANSCRIBE_OPTIONS, SEGMENT_FIELDS
+
+# --- ASR Worker Process ---
+# Keeps Whisper decoding out of the HUD's process, so the render loop doesn't compete with
+# it for the GIL. Utterance audio is copied once into a shared memory block and read in
+# place by the worker; only small JSON lines (block name, sample count, options / segment
+# text and scores) go through the worker's stdin/stdout pipes. The worker is a plain
+# `python asr_worker.py` child rather than a multiprocessing spawn, which would re-run
+# main.py's module level (pygame window, microphone) in the child.
+
+RATE = 16000
+INITIAL_SECONDS = 30 # Shared block size; re-created bigger if an utterance is ever longer
+
+
+def _attach(name):
+    # Attach to the parent's block without letting this process's resource tracker unlink it at exit
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(block._name, "shared_memory")
+    except Exception:
+        pass
+    return block
+
+
+class ASRWorkerProcess:
+    """
+    Model-like proxy with WhisperModel's transcribe() call (like asr_service.ASRClient),
+    backed by a child process that owns the model.
+    """
+
+    def __init__(self, settings, warmup=True, initial_seconds=INITIAL_SECONDS, rate=RATE):
+        self.settings = dict(settings)
+        self.warmup = warmup
+        self.capacity = int(initial_seconds * rate)
+        self.process = None
+        self.block = None
+        self.samples = None
+        self.lock = threading.Lock()
+
+    def start(self, on_stage=None):
+        """Starts the worker and blocks until its model is loaded. on_stage(state, progress) reports progress."""
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__)], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, text=True, bufsize=1)
+        self._send({"settings": self.settings, "warmup": self.warmup})
+        while True:
+            message = self._receive()
+            if "stage" in message:
+                if on_stage:
+                    on_stage(message["stage"], message["progress"])
+            elif message.get("error"):
+                self.close()
+                raise RuntimeError(message["error"])
+            elif message.get("ready"):
+                return self
+
+    def _send(self, message):
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+
+    def _receive(self):
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"ASR worker process exited (code {self.process.poll()})")
+        return json.loads(line)
+
+    def _ensure_capacity(self, num_samples):
+        if self.block is not None and num_samples <= self.capacity:
+            return
+        self._release_block()
+        self.capacity = max(self.capacity, num_samples)
+        self.block = shared_memory.SharedMemory(create=True, size=self.capacity * 4)
+        self.samples = np.ndarray((self.capacity,), dtype=np.float32, buffer=self.block.buf)
+
+    def _release_block(self):
+        if self.block is not None:
+            self.samples = None # Views must go before the block can be closed
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+    def transcribe(self, audio_np, **options):
+        num_samples = len(audio_np)
+        with self.lock: # One request in flight, the shared block is reused
+            self._ensure_capacity(num_samples)
+            self.samples[:num_samples] = audio_np # The only copy of the audio
+            self._send({"block": self.block.name, "samples": num_samples,
+                        "options": {key: value for key, value in options.items() if key in TRANSCRIBE_OPTIONS}})
+            reply = self._receive()
+        if reply.get("error"):
+            raise RuntimeError(f"ASR worker: {reply['error']}")
+        segments = [SimpleNamespace(**segment) for segment in reply["segments"]]
+        return iter(segments), SimpleNamespace(duration=reply["duration"], decode_s=reply["decode_s"])
+
+    def close(self):
+        if self.process is not None:
+            try:
+                self._send({"quit": True})
+                self.process.wait(timeout=5)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                self.process.kill()
+            self.process = None
+        self._release_block()
+
+
+def _worker_main():
+    # Child side: stdout is the reply channel, everything else printed goes to stderr
+    import time
+    from model_loader import ModelLoader
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+
+    def send(message):
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+    config = json.loads(sys.stdin.readline())
+    loader = ModelLoader(**config["settings"], warmup=config["warmup"],
+                         on_stage=lambda state, progress: send({"stage": state, "progress": progress}))
+    try:
+        model = loader.start().result()
+    except Exception as e:
+        send({"error": f"model load failed: {e}"})
+        return
+    send({"ready": True})
+
+    block = None
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request.get("quit"):
+            break
+        try:
+            if block is None or block.name != request["block"]:
+                if block is not None:
+                    block.close()
+                block = _attach(request["block"])
+            audio_np = np.ndarray((request["samples"],), dtype=np.float32, buffer=block.buf)
+            start = time.time()
+            segments, info = model.transcribe(audio_np, **request["options"])
+            segments = [{field: getattr(segment, field) for field in SEGMENT_FIELDS} for segment in segments]
+            send({"segments": segments, "duration": info.duration, "decode_s": time.time() - start})
+        except Exception as e:
+            send({"error": str(e)})
+        finally:
+            audio_np = None # No view of the block may outlive the request, it can be swapped for a bigger one
+    if block is not None:
+        block.close()
+
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,293 @@
+import sys
+import time
+import wave
+import threading
+import numpy as np
+
+# pyaudio is only imported by MicrophoneCapture, so file/stdin/array sources work on headless machines
+
+# --- Capture Configuration (matches the VAD/Whisper settings in main.py and speechreg.py) ---
+CHANNELS = 1
+RATE = 16000
+FRAME_DURATION_MS = 30 # webrtcvad accepts 10, 20 or 30 ms frames
+CHUNK_SIZE = int(RATE * FRAME_DURATION_MS / 1000) # Number of samples per frame
+RING_SECONDS = 10 # How much audio the capture ring can hold before the oldest frames are dropped
+
+
+class FrameRing:
+    """
+    Preallocated ring of fixed-size int16 frames shared between the PortAudio
+    callback (writer) and the segmenter (reader). Frames are copied into
+    existing slots, so nothing is allocated per frame once the ring exists.
+    """
+
+    def __init__(self, num_frames, frame_size):
+        self.frames = np.zeros((num_frames, frame_size), dtype=np.int16)
+        self.num_frames = num_frames
+        self.frame_size = frame_size
+        self.write_index = 0 # Total frames ever written
+        self.read_index = 0  # Total frames ever read
+        self.dropped = 0     # Frames overwritten before the reader got to them
+        self._partial = np.zeros(frame_size, dtype=np.int16) # Leftover samples from an odd-sized callback
+        self._partial_len = 0
+        self._cond = threading.Condition()
+        self.listener = None # Called (on the writer's thread) after every write
+
+    def write(self, samples):
+        # Called from the audio callback with an int16 view of the callback buffer
+        with self._cond:
+            pos = 0
+            total = len(samples)
+            if self._partial_len:
+                take = min(self.frame_size - self._partial_len, total)
+                self._partial[self._partial_len:self._partial_len + take] = samples[:take]
+                self._partial_len += take
+                pos = take
+                if self._partial_len == self.frame_size:
+                    self._commit(self._partial)
+                    self._partial_len = 0
+            while total - pos >= self.frame_size:
+                self._commit(samples[pos:pos + self.frame_size])
+                pos += self.frame_size
+            if pos < total:
+                self._partial[:total - pos] = samples[pos:]
+                self._partial_len = total - pos
+            self._cond.notify_all()
+        if self.listener is not None:
+            self.listener()
+
+    def _commit(self, frame):
+        self.frames[self.write_index % self.num_frames] = frame
+        self.write_index += 1
+        # If the reader fell a whole ring behind, skip it forward past the overwritten frames
+        if self.write_index - self.read_index > self.num_frames:
+            self.dropped += self.write_index - self.read_index - self.num_frames
+            self.read_index = self.write_index - self.num_frames
+
+    def read(self, timeout=None):
+        """
+        Returns the next frame as a view into the ring, or None on timeout.
+        The view stays valid until the writer wraps around to this slot again,
+        so callers that keep frames around must copy them.
+        """
+        with self._cond:
+            if self.read_index >= self.write_index:
+                self._cond.wait_for(lambda: self.read_index < self.write_index, timeout)
+                if self.read_index >= self.write_index:
+                    return None
+            frame = self.frames[self.read_index % self.num_frames]
+            self.read_index += 1
+            return frame
+
+    def discard_pending(self):
+        # Drop everything captured so far (e.g. SAGI's own voice while it was speaking)
+        with self._cond:
+            self.read_index = self.write_index
+
+    def pending(self):
+        with self._cond:
+            return self.write_index - self.read_index
+
+
+# --- Audio Sources ---
+# Everything the segmenter reads from implements the same small interface:
+#   start()                 - begin producing frames (no-op if already started)
+#   read_frame(timeout)     - next int16 frame of `frame_size` samples, or None
+#   finished                - True once a finite source has no more frames
+#   discard_pending()       - drop frames that are buffered but not read yet
+#   set_listener(callback)  - have callback() called from the capture thread when frames arrive,
+#                             False if the source can't (read_frame blocks or paces instead)
+#   close()
+# Frames returned by read_frame() may be views into internal buffers, copy them to keep them.
+
+class AudioSource:
+    def __init__(self, rate=RATE, frame_size=CHUNK_SIZE):
+        self.rate = rate
+        self.frame_size = frame_size
+        self.finished = False
+
+    def start(self):
+        pass
+
+    def read_frame(self, timeout=None):
+        raise NotImplementedError
+
+    def discard_pending(self):
+        pass
+
+    def set_listener(self, callback):
+        return False
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MicrophoneCapture(AudioSource):
+    """
+    One long-lived PyAudio input stream in callback mode. Capture keeps running
+    between turns, so nothing the user says while we transcribe is lost.
+    """
+
+    def __init__(self, audio_interface, rate=RATE, frame_size=CHUNK_SIZE, ring_seconds=RING_SECONDS):
+        super().__init__(rate, frame_size)
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.audio_interface = audio_interface
+        num_frames = int(ring_seconds * rate / frame_size)
+        self.ring = FrameRing(num_frames, frame_size)
+        self.stream = None
+        self.overflows = 0
+
+    def _callback(self, in_data, frame_count, time_info, status_flags):
+        if status_flags & self.pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return (None, self.pyaudio.paContinue)
+
+    def start(self):
+        if self.stream is not None:
+            return
+        self.stream = self.audio_interface.open(format=self.pyaudio.paInt16,
+                                                channels=CHANNELS,
+                                                rate=self.rate,
+                                                input=True,
+                                                frames_per_buffer=self.frame_size,
+                                                stream_callback=self._callback)
+        self.stream.start_stream()
+
+    def read_frame(self, timeout=None):
+        return self.ring.read(timeout)
+
+    def discard_pending(self):
+        self.ring.discard_pending()
+
+    def set_listener(self, callback):
+        self.ring.listener = callback
+        return True
+
+    def close(self):
+        if self.stream is not None:
+            if self.stream.is_active():
+                self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+
+class ArraySource(AudioSource):
+    """
+    Serves frames from audio already in memory (int16, or float32 in [-1, 1]).
+    With realtime=False frames come out as fast as they are read, which is what
+    benchmarks and regression runs want. realtime=True paces them like a live mic.
+    """
+
+    def __init__(self, samples, rate=RATE, frame_size=CHUNK_SIZE, realtime=False):
+        super().__init__(rate, frame_size)
+        samples = np.asarray(samples)
+        if samples.dtype != np.int16:
+            samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+        self.samples = samples
+        self.realtime = realtime
+        self.position = 0
+        self._start_time = None
+        self._frames_served = 0
+
+    def read_frame(self, timeout=None):
+        end = self.position + self.frame_size
+        if end > len(self.samples):
+            # A trailing partial frame is dropped, webrtcvad only accepts whole frames
+            self.finished = True
+            return None
+        if self.realtime:
+            if self._start_time is None:
+                self._start_time = time.perf_counter()
+            due = self._start_time + self._frames_served * self.frame_size / self.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        frame = self.samples[self.position:end]
+        self.position = end
+        self._frames_served += 1
+        return frame
+
+    def duration(self):
+        return len(self.samples) / self.rate
+
+
+def _to_mono_rate(samples, channels, source_rate, rate):
+    # Downmix and linearly resample so any WAV can feed the 16 kHz mono pipeline
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if source_rate != rate:
+        n_out = int(len(samples) * rate / source_rate)
+        positions = np.arange(n_out) * (source_rate / rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype(np.int16) if samples.dtype != np.int16 else samples
+
+
+class WavFileSource(ArraySource):
+    def __init__(self, path, rate=RATE, frame_size=CHUNK_SIZE, realtime=False):
+        with wave.open(str(path), 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+            channels = wav.getnchannels()
+            source_rate = wav.getframerate()
+            samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        super().__init__(_to_mono_rate(samples, channels, source_rate, rate), rate, frame_size, realtime)
+        self.path = str(path)
+
+
+class RawPcmSource(ArraySource):
+    """Headerless little-endian int16 PCM, assumed to already be mono at `rate`."""
+
+    def __init__(self, path, rate=RATE, frame_size=CHUNK_SIZE, realtime=False):
+        super().__init__(np.fromfile(str(path), dtype='<i2'), rate, frame_size, realtime)
+        self.path = str(path)
+
+
+class StdinSource(AudioSource):
+    """Raw int16 mono PCM piped in on stdin, e.g. `arecord -f S16_LE -r 16000 | python speechreg.py -i -`."""
+
+    def __init__(self, rate=RATE, frame_size=CHUNK_SIZE, stream=None):
+        super().__init__(rate, frame_size)
+        self.stream = stream or sys.stdin.buffer
+        self.frame = np.zeros(frame_size, dtype=np.int16)
+        self._bytes = memoryview(self.frame.view(np.uint8))
+
+    def read_frame(self, timeout=None):
+        if self.finished:
+            return None
+        filled = 0
+        while filled < len(self._bytes):
+            n = self.stream.readinto(self._bytes[filled:])
+            if not n:
+                self.finished = True
+                return None
+            filled += n
+        return self.frame
+
+
+PCM_EXTENSIONS = ('.raw', '.pcm', '.s16')
+
+def open_source(spec, rate=RATE, frame_size=CHUNK_SIZE, realtime=False, audio_interface=None):
+    """
+    Builds a source from a command-line style spec: "mic", "-" for stdin,
+    a .wav file, or a headerless .raw/.pcm file.
+    """
+    spec = str(spec)
+    if spec == "mic":
+        if audio_interface is None:
+            import pyaudio
+            audio_interface = pyaudio.PyAudio()
+        return MicrophoneCapture(audio_interface, rate=rate, frame_size=frame_size)
+    if spec == "-":
+        return StdinSource(rate, frame_size)
+    if spec.lower().endswith(PCM_EXTENSIONS):
+        return RawPcmSource(spec, rate, frame_size, realtime)
+    return WavFileSource(spec, rate, frame_size, realtime)
@@ -1,121 +1,152 @@
-import nltk
 import webbrowser
 import re
+import sys
+import json
+import argparse
+import threading
+from urllib.parse import quote
 
-# Download NLTK data if you haven't already
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('taggers/averaged_perceptron_tagger')
-except nltk.downloader.DownloadError:
-    nltk.download('punkt')
-    nltk.download('averaged_perceptron_tagger')
+# --- Query Parser ---
+# The provider registry and every pattern are compiled once, in QueryParser, instead of on
+# every call. parse() is pure (no printing, no browser), so it can also run over files of
+# queries (--batch) and be benchmarked (bench_query_parser.py).
 
-def process_user_query(user_input):
+# Search providers and their base URLs, %s is replaced by the URL-encoded question
+SEARCH_PROVIDERS = {
+    "google": "https://www.google.com/search?q=%s",
+    "youtube": "https://www.youtube.com/results?search_query=%s",
+    "x": "https://twitter.com/search?q=%s", # X (formerly Twitter)
+    "twitter": "https://twitter.com/search?q=%s",
+    "linkedin": "https://www.linkedin.com/search/results/all/?keywords=%s",
+    # Add more search providers here
+    # "wikipedia": "https://en.wikipedia.org/wiki/Special:Search?search=%s",
+}
+DEFAULT_PROVIDER = "google"
+
+# Keywords for general search command, excluding specific website names
+GENERAL_SEARCH_PHRASES = ("search for", "look for", "find", "see", "lookup", "check")
+# Conversational fillers / question words dropped from the start of the question
+LEADING_FILLERS = ("please", "can you", "could you", "what is", "how to", "where is", "when did", "who is")
+
+
+def _alternation(phrases):
+    # Longest first, so a phrase never loses to its own prefix
+    return "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+
+
+class QueryParser:
+    def __init__(self, providers=SEARCH_PROVIDERS, search_phrases=GENERAL_SEARCH_PHRASES,
+                 fillers=LEADING_FILLERS, default_provider=DEFAULT_PROVIDER):
+        self.providers = dict(providers)
+        self.default_provider = default_provider
+        self.order = {name: rank for rank, name in enumerate(self.providers)} # Earlier providers win ties
+        sites = _alternation(self.providers)
+        # "search on youtube", "see in x", "linkedin search for", "search twitter for"
+        self.site_pattern = re.compile(rf"\b(?:on|in) ({sites})\b|\b({sites}) search for\b|\bsearch ({sites}) for\b")
+        # Every command phrase and site name, removed from the question
+        site_phrases = [f"{prefix}{name}{suffix}" for name in self.providers
+                        for prefix, suffix in (("on ", ""), ("in ", ""), ("", " search for"), ("search ", " for"), ("", ""))]
+        self.removal_pattern = re.compile(rf"\b(?:{_alternation(list(search_phrases) + site_phrases)})\b")
+        self.search_pattern = re.compile(rf"\b(?:{_alternation(search_phrases)})\b")
+        self.filler_pattern = re.compile(rf"^(?:{_alternation(fillers)})\b\s*")
+        self.edge_pattern = re.compile(r"^\W+|\W+$")
+        self.space_pattern = re.compile(r"\s+")
+
+    def provider(self, normalized):
+        """Provider named in the (lowercase) query, or None."""
+        best = None
+        for match in self.site_pattern.finditer(normalized):
+            name = match.group(match.lastindex)
+            if best is None or self.order[name] < self.order[best]:
+                best = name
+        return best
+
+    def clean(self, text):
+        text = self.filler_pattern.sub("", self.edge_pattern.sub("", text.strip()))
+        return self.space_pattern.sub(" ", self.edge_pattern.sub("", text)).strip()
+
+    def parse(self, query):
+        """(provider, question, url) for a spoken search request; url is None if there is no question."""
+        normalized = query.lower()
+        provider = self.provider(normalized)
+        question = self.clean(self.removal_pattern.sub("", normalized))
+        if provider is None:
+            provider = self.default_provider
+            command = self.search_pattern.search(normalized)
+            if command is not None:
+                # A general search command but no website: the question is what follows the command
+                question = self.clean(normalized[command.end():]) or self.clean(normalized)
+            elif not question:
+                question = query.strip() # No command at all, the whole input is the question
+        if not question:
+            return provider, "", None
+        return provider, question, self.providers[provider] % quote(question, safe="")
+
+    def parse_many(self, queries):
+        return [self.parse(query) for query in queries]
+
+
+_parser = None
+
+def default_parser():
+    global _parser
+    if _parser is None:
+        _parser = QueryParser()
+    return _parser
+
+
+def open_url(url):
+    # webbrowser.open can block for seconds while it starts a browser, don't hold up the caller
+    # (not a daemon thread: a script that exits right after still gets its browser)
+    threading.Thread(target=webbrowser.open, args=(url,)).start()
+
+
+def process_user_query(user_input, parser=None):
     """
     Processes the user's input to extract a question and perform a search
     on a specified website or Google by default.
     """
-    # Define search providers and their base URLs
-    # %s will be replaced by the search query
-    search_providers = {
-        "google": "https://www.google.com/search?q=%s",
-        "youtube": "https://www.youtube.com/results?search_query=%s",
-        "x": "https://twitter.com/search?q=%s", # X (formerly Twitter)
-        "twitter": "https://twitter.com/search?q=%s",
-        "linkedin": "https://www.linkedin.com/search/results/all/?keywords=%s",
-        # Add more search providers here
-        # "wikipedia": "https://en.wikipedia.org/wiki/Special:Search?search=%s",
-    }
-
-    # Keywords for general search command, excluding specific website names for now
-    general_search_phrases = [
-        "search for", "look for", "find", "see", "lookup", "check"
-    ]
-
-    normalized_input = user_input.lower()
-    
-    # Default to Google if no specific website is mentioned
-    target_website = "google"
-    question = ""
-    found_search_command = False
-
-    # 1. Identify the target website first
-    for site_name in search_providers.keys():
-        # Look for phrases like "search on youtube", "see in x", "linkedin search for"
-        if f" on {site_name}" in normalized_input or \
-           f" in {site_name}" in normalized_input or \
-           f" {site_name} search for" in normalized_input or \
-           f" search {site_name} for" in normalized_input:
-            target_website = site_name
-            found_search_command = True
-            break
-    
-    # 2. Extract the question after identifying the target website
-    # Create a regex pattern to remove all identified search command phrases and website names
-    # This pattern needs to be carefully constructed to avoid removing parts of the question
-    
-    # Combine general search phrases and specific site-related phrases
-    all_removal_patterns = []
-    for phrase in general_search_phrases:
-        all_removal_patterns.append(re.escape(phrase))
-    
-    for site_name in search_providers.keys():
-        all_removal_patterns.append(re.escape(f" on {site_name}"))
-        all_removal_patterns.append(re.escape(f" in {site_name}"))
-        all_removal_patterns.append(re.escape(f" {site_name} search for"))
-        all_removal_patterns.append(re.escape(f" search {site_name} for"))
-        # Add the site name itself, in case it's used directly like "youtube what is..."
-        all_removal_patterns.append(re.escape(site_name))
-
-
-    # Make the regex pattern
-    removal_regex = r'\b(?:' + '|'.join(all_removal_patterns) + r')\b'
-    
-    # Remove the search command parts
-    temp_question = re.sub(removal_regex, '', normalized_input).strip()
-
-    # Further clean up common conversational fillers or leading question words if they are now at the start
-    temp_question = re.sub(r'^(?:please|can you|could you|what is|how to|where is|when did|who is)\s*', '', temp_question, flags=re.IGNORECASE).strip()
-    
-    # Remove any remaining leading/trailing punctuation or "that"
-    question = re.sub(r'^\W+|\W+$', '', temp_question).strip()
-    
-    # Handle cases where the whole input might just be the question without a clear command
-    if not found_search_command and any(phrase in normalized_input for phrase in general_search_phrases):
-        print("I found a general search command but no specific website. Defaulting to Google.")
-        # Try to extract the question by just removing general phrases
-        for phrase in general_search_phrases:
-            if phrase in normalized_input:
-                parts = normalized_input.split(phrase, 1) # Split only once
-                if len(parts) > 1:
-                    question = parts[1].strip()
-                    break
-        if not question and normalized_input: # If no specific phrase worked, assume whole input is question
-             question = normalized_input
-             
-        question = re.sub(r'^\W+|\W+$', '', question).strip()
-        question = re.sub(r'^(?:please|can you|could you|what is|how to|where is|when did|who is)\s*', '', question, flags=re.IGNORECASE).strip()
-        
-    elif not found_search_command and not question: # If no command found at all, treat whole input as question
-        print("No specific search command or website found. Treating the entire input as the question for Google.")
-        question = user_input.strip()
-
-    if question:
-        # Encode the query for URL
-        search_query_encoded = re.sub(r'\s+', '%20', question) # Replace spaces with %20 for URL encoding
-        search_query_encoded = re.sub(r'[^\w\s-]', '', search_query_encoded) # Remove non-alphanumeric except space and hyphen
-        search_query_encoded = search_query_encoded.replace(" ", "%20") # Final encoding for spaces
-
-        target_url = search_providers[target_website] % search_query_encoded
-
-        print(f"\nSearching '{question}' on {target_website.capitalize()}...")
-        print(f"Opening URL: {target_url}")
-        webbrowser.open(target_url)
+    provider, question, url = (parser or default_parser()).parse(user_input)
+    if url:
+        print(f"\nSearching '{question}' on {provider.capitalize()}...")
+        print(f"Opening URL: {url}")
+        open_url(url)
     else:
         print("Could not extract a valid question from your input. Please try again.")
         print(f"Original input: {user_input}")
+    return provider, question, url
+
+
+def run_batch(in_path, out_path=None, parser=None):
+    # One query per line in, one JSON object per line out (stdout without out_path)
+    parser = parser or default_parser()
+    out = open(out_path, "w") if out_path else sys.stdout
+    count = 0
+    try:
+        with open(in_path) as queries:
+            for line in queries:
+                query = line.strip()
+                if not query:
+                    continue
+                provider, question, url = parser.parse(query)
+                out.write(json.dumps({"query": query, "provider": provider, "question": question, "url": url}) + "\n")
+                count += 1
+    finally:
+        if out_path:
+            out.close()
+    return count
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Search the web from a spoken-style query.")
+    arg_parser.add_argument("--batch", metavar="FILE", help="Parse every line of FILE and write JSONL instead of searching")
+    arg_parser.add_argument("-o", "--output", help="JSONL output file for --batch (default: stdout)")
+    args = arg_parser.parse_args()
+
+    if args.batch:
+        count = run_batch(args.batch, args.output)
+        print(f"Parsed {count} queries.", file=sys.stderr)
+        sys.exit(0)
+
     print("Welcome! I can help you search various websites.")
     print("Try asking something like:")
     print("  - 'What is the capital of France search in google?'")
@@ -125,4 +156,4 @@ if __name__ == "__main__":
     print("  - 'How to install python on windows'") # This will default to Google
 
     user_input = input("\nEnter your query: ")
-    process_user_query(user_input)
\ No newline at end of file
+    process_user_query(user_input)
@@ -0,0 +1,214 @@
+# Hardware autotuner: picks the Whisper model size, compute type and thread count for this host
+#
+#   python autotune.py clips/                    # WAV/raw clips; clip.txt next to clip.wav = reference transcript
+#   python autotune.py clips/ --latency-ms 600 --models tiny.en base.en
+#   python autotune.py --show                    # print this host's saved profile
+#
+# Every candidate is benchmarked in a fresh process (so its memory use can be measured),
+# decoding each clip the way the assistant does (adaptive greedy/beam). The most accurate
+# candidate whose p90 per-clip latency stays within the budget is saved as this host's
+# profile, which main.py, speechreg.py, test.py and asr_service.py load at startup.
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# --- Candidates ---
+MODEL_SIZES = ("tiny.en", "base.en", "small.en")
+COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+NUM_WORKERS = (1, 2)
+LATENCY_BUDGET_MS = 800   # p90 decode latency per clip (commands are 1-3 s of speech)
+# Without reference transcripts, bigger models and wider compute types count as more accurate
+MODEL_RANK = {size: rank for rank, size in enumerate(MODEL_SIZES)}
+COMPUTE_RANK = {compute: rank for rank, compute in enumerate(COMPUTE_TYPES)}
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".sagi")
+PROFILE_PATH = os.path.join(PROFILE_DIR, f"asr_profile_{socket.gethostname()}.json")
+PROFILE_KEYS = ("model_size", "device", "compute_type", "cpu_threads", "num_workers")
+
+
+def load_profile(defaults, path=PROFILE_PATH):
+    """
+    `defaults` (model_size, device, compute_type, cpu_threads, num_workers) updated with
+    this host's saved profile, if there is one.
+    """
+    settings = dict(defaults)
+    try:
+        with open(path) as profile:
+            saved = json.load(profile)
+    except (OSError, ValueError):
+        return settings
+    settings.update((key, saved[key]) for key in PROFILE_KEYS if key in saved)
+    print(f"Using autotuned ASR profile {path}: {settings['model_size']}, {settings['compute_type']}, "
+          f"{settings['cpu_threads']} thread(s)")
+    return settings
+
+
+def thread_counts():
+    cores = os.cpu_count() or 1
+    counts = {1, cores}
+    count = 2
+    while count < cores:
+        counts.add(count)
+        count *= 2
+    return sorted(counts)
+
+
+def load_clips(paths):
+    # (path, reference transcript or None)
+    from batch_transcribe import list_audio_files
+    clips = []
+    for path in list_audio_files(paths):
+        reference = os.path.splitext(path)[0] + ".txt"
+        text = open(reference).read().strip() if os.path.exists(reference) else None
+        clips.append((path, text))
+    return clips
+
+
+def word_errors(reference, hypothesis):
+    # Word-level edit distance, (errors, reference words)
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, guess in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != guess))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0 # bytes on macOS, KiB elsewhere
+
+
+def benchmark_candidate(candidate, clips):
+    # Runs in its own process: load, warm up, then decode every clip and time it
+    import numpy as np
+    from faster_whisper import WhisperModel
+    from audio_capture import open_source
+    from adaptive_decode import DecodePolicy
+    from model_loader import warm_up
+
+    start = time.time()
+    model = WhisperModel(candidate["model_size"], device=candidate["device"], compute_type=candidate["compute_type"],
+                         cpu_threads=candidate["cpu_threads"], num_workers=candidate["num_workers"])
+    load_time = time.time() - start
+    warm_up(model)
+    policy = DecodePolicy()
+    audio = [open_source(path).samples.astype(np.float32) / 32768.0 for path, _ in clips]
+
+    def decode(audio_np):
+        decode_start = time.time()
+        text, _, _ = policy.decode(model, audio_np)
+        return text, time.time() - decode_start
+
+    # num_workers > 1 only helps with concurrent requests, so feed it that many at once
+    run_start = time.time()
+    with ThreadPoolExecutor(max_workers=candidate["num_workers"]) as pool:
+        results = list(pool.map(decode, audio))
+    wall = time.time() - run_start
+
+    latencies = sorted(seconds for _, seconds in results)
+    errors = words = 0
+    for (_, reference), (text, _) in zip(clips, results):
+        if reference is not None:
+            clip_errors, clip_words = word_errors(reference, text)
+            errors += clip_errors
+            words += clip_words
+    audio_seconds = sum(len(audio_np) for audio_np in audio) / 16000.0
+    return dict(candidate, load_s=round(load_time, 2), rtf=round(wall / audio_seconds, 4),
+                p90_ms=round(1000 * latencies[min(int(0.9 * len(latencies)), len(latencies) - 1)], 1),
+                memory_mb=_peak_rss_mb(), wer=round(errors / words, 4) if words else None)
+
+
+def accuracy_key(result):
+    # Higher is better: measured WER when there are references, otherwise model/compute rank
+    wer = result["wer"]
+    return (-wer if wer is not None else 0.0, MODEL_RANK.get(result["model_size"], -1),
+            COMPUTE_RANK.get(result["compute_type"], -1), -result["p90_ms"])
+
+
+def autotune(clips, models=MODEL_SIZES, compute_types=COMPUTE_TYPES, threads=None, workers=NUM_WORKERS,
+             latency_ms=LATENCY_BUDGET_MS, max_memory_mb=None, device="cpu"):
+    results = []
+    candidates = [dict(model_size=m, device=device, compute_type=c, cpu_threads=t, num_workers=w)
+                  for m, c, t, w in itertools.product(models, compute_types, threads or thread_counts(), workers)]
+    context = multiprocessing.get_context("spawn") # Fresh process per candidate: clean memory numbers
+    for number, candidate in enumerate(candidates, 1):
+        label = (f"{candidate['model_size']:<9} {candidate['compute_type']:<13} "
+                 f"threads={candidate['cpu_threads']:<2} workers={candidate['num_workers']}")
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(benchmark_candidate, candidate, clips).result()
+        except Exception as e:
+            print(f"[{number}/{len(candidates)}] {label}  failed: {e}")
+            continue
+        result["fits"] = (result["p90_ms"] <= latency_ms
+                          and (max_memory_mb is None or result["memory_mb"] is None
+                               or result["memory_mb"] <= max_memory_mb))
+        results.append(result)
+        wer = f"{100 * result['wer']:.1f}%" if result["wer"] is not None else "n/a"
+        print(f"[{number}/{len(candidates)}] {label}  RTF {result['rtf']:.3f}  p90 {result['p90_ms']:.0f} ms  "
+              f"mem {result['memory_mb'] or 0:.0f} MB  WER {wer}  {'ok' if result['fits'] else 'over budget'}")
+
+    fitting = [result for result in results if result["fits"]]
+    if not fitting:
+        return None, results
+    return max(fitting, key=accuracy_key), results
+
+
+def save_profile(best, latency_ms, path=PROFILE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profile = dict(best, host=socket.gethostname(), latency_budget_ms=latency_ms,
+                   tuned_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    with open(path, "w") as out:
+        json.dump(profile, out, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the fastest-enough, most accurate Whisper setup for this host.")
+    parser.add_argument("clips", nargs="*", help="Reference clips (files, directories or manifests)")
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_BUDGET_MS, help="p90 per-clip latency budget")
+    parser.add_argument("--max-memory-mb", type=float, help="Optional peak memory budget")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_SIZES))
+    parser.add_argument("--compute-types", nargs="+", default=list(COMPUTE_TYPES))
+    parser.add_argument("--threads", type=int, nargs="+", help="cpu_threads values (default: 1, 2, 4, ... cores)")
+    parser.add_argument("--workers", type=int, nargs="+", default=list(NUM_WORKERS))
+    parser.add_argument("--profile", default=PROFILE_PATH, help="Where to save the profile")
+    parser.add_argument("--show", action="store_true", help="Print the saved profile and exit")
+    args = parser.parse_args()
+
+    if args.show:
+        if not os.path.exists(args.profile):
+            print(f"No profile at {args.profile}")
+            sys.exit(1)
+        print(open(args.profile).read())
+        sys.exit(0)
+    if not args.clips:
+        parser.error("reference clips are required")
+
+    clips = load_clips(args.clips)
+    if not clips:
+        print("No clips found.")
+        sys.exit(1)
+    print(f"Autotuning on {len(clips)} clip(s), p90 latency budget {args.latency_ms:.0f} ms")
+    best, results = autotune(clips, args.models, args.compute_types, args.threads, args.workers,
+                             args.latency_ms, args.max_memory_mb)
+    if best is None:
+        print("No configuration meets the budget; keeping the current settings.")
+        sys.exit(1)
+    path = save_profile(best, args.latency_ms, args.profile)
+    print(f"\nSelected {best['model_size']} / {best['compute_type']} / {best['cpu_threads']} thread(s) / "
+          f"{best['num_workers']} worker(s) (RTF {best['rtf']:.3f}, p90 {best['p90_ms']:.0f} ms), saved to {path}")
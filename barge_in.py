@@ -0,0 +1,137 @@
+import time
+import numpy as np
+
+# --- Barge-In (full-duplex listening) ---
+# The microphone keeps running while SAGI speaks, so the user can interrupt a long reply.
+# The hard part is SAGI hearing itself: every reply comes back through the mic, and it is
+# speech, so the VAD passes it. While a reply plays, a voiced mic frame only counts as the
+# user if it is clearly louder than the echo we expect from what is being played. The
+# reference is the cached WAV being played (known sample for sample), scaled by a coupling
+# factor (speaker volume x room x mic gain) learned from the frames that were just echo.
+# When the pipeline falls back to live pyttsx3 speech (or plays a file it couldn't read)
+# there is no reference and no way to tell SAGI's voice from the user's, so every frame
+# counts as echo and there is no barge-in until that sentence is over.
+
+RATE = 16000
+FRAME_DURATION_MS = 30
+ECHO_WINDOW_MS = 300   # Output + room + capture latency: reference this far back can still reach the mic
+ECHO_MARGIN = 2.0      # The user has to be this many times louder than the expected echo
+COUPLING_INITIAL = 1.0 # Echo level / reference level before anything was learned (deliberately strict)
+COUPLING_FALL = 0.1    # How fast the learned echo level follows quieter echo-only frames...
+COUPLING_RISE = 0.02   # ...and louder ones, slowly: a user too quiet to pass the gate mustn't raise it
+REFERENCE_FLOOR = 50.0 # Reference frames quieter than this (RMS) say nothing about the coupling
+ONSET_FRAMES = 4       # Same onset window as the segmenter, the reaction is timed from its first user frame
+
+
+def frame_levels(samples, frame_size):
+    # RMS of every whole frame of an int16 signal
+    count = len(samples) // frame_size
+    frames = samples[:count * frame_size].reshape(count, frame_size).astype(np.float32)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def _follow(estimate, value):
+    return estimate + (COUPLING_FALL if value < estimate else COUPLING_RISE) * (value - estimate)
+
+
+class EchoGate:
+    """
+    Sits between the VAD and the segmenter: filter(frame, is_speech) returns whether the
+    frame is the user speaking. Outside playback it passes the VAD decision through.
+    `speaking` is the TTS worker's event (set while a reply is being spoken) and `live` the
+    pipeline's (set while the engine speaks live, None: assume it may be whenever nothing
+    plays); the player calls playback_started(samples) / playback_stopped() around every
+    file it plays.
+    barge_in(cancel) is called when the segmenter triggers on the user mid-reply.
+    """
+
+    def __init__(self, speaking, live=None, rate=RATE, frame_duration_ms=FRAME_DURATION_MS,
+                 echo_window_ms=ECHO_WINDOW_MS, margin=ECHO_MARGIN):
+        self.speaking = speaking
+        self.live = live
+        self.rate = rate
+        self.frame_size = int(rate * frame_duration_ms / 1000)
+        self.frame_duration = frame_duration_ms / 1000.0
+        self.echo_window = echo_window_ms / 1000.0
+        self.margin = margin
+        self.coupling = COUPLING_INITIAL
+        self.reference = None  # Per-frame RMS of the file being (or last) played
+        self.started_at = None
+        self.stopped_at = None
+        self.released = False  # Set by barge_in(): the user has the floor until the next playback
+        self.user_times = [None] * ONSET_FRAMES
+        self.user_index = 0
+        self.onset = None      # Start of the speech that interrupted the playing file
+        self.reactions = []    # Seconds from that speech onset to playback stopped
+        self.suppressed = 0    # Voiced frames dropped as echo
+
+    def playback_started(self, samples):
+        # samples: int16 at `rate` of what is about to play, None if unknown
+        self.reference = frame_levels(np.asarray(samples), self.frame_size) if samples is not None else None
+        self.started_at = time.monotonic()
+        self.stopped_at = None
+        self.released = False
+
+    def playback_stopped(self):
+        now = time.monotonic()
+        self.stopped_at = now
+        if self.onset is not None:
+            self.reactions.append(now - self.onset)
+            self.onset = None
+
+    def _playing(self, now):
+        # A file is playing, or stopped so recently that its tail is still arriving
+        return self.started_at is not None and (self.stopped_at is None or now - self.stopped_at < self.echo_window)
+
+    def _reference_level(self, now):
+        # Loudest reference frame that can be reaching the mic right now
+        elapsed = now - self.started_at
+        last = min(int(elapsed / self.frame_duration), len(self.reference) - 1)
+        first = max(int((elapsed - self.echo_window) / self.frame_duration), 0)
+        if last < first:
+            return 0.0
+        return float(self.reference[first:last + 1].max())
+
+    def filter(self, frame, is_speech):
+        now = time.monotonic()
+        self.user_times[self.user_index % ONSET_FRAMES] = None
+        if self.released and not (self.speaking.is_set() or self._playing(now)):
+            self.released = False # The interrupted reply is over, gate the next one again
+        if self.released or not (self.speaking.is_set() or self._playing(now)):
+            user = bool(is_speech)
+        else:
+            if self._playing(now) and self.reference is not None:
+                level = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+                reference = self._reference_level(now)
+                user = is_speech and level > self.margin * self.coupling * max(reference, REFERENCE_FLOOR)
+                if not user and reference > REFERENCE_FLOOR:
+                    self.coupling = _follow(self.coupling, level / reference)
+            elif self._playing(now) or self.live is None or self.live.is_set():
+                user = False # Live engine speech or an unknown file: nothing to compare against
+            else:
+                user = bool(is_speech) # Between two sentences, nothing is playing
+            if is_speech and not user:
+                self.suppressed += 1
+        if user:
+            self.user_times[self.user_index % ONSET_FRAMES] = now
+        self.user_index += 1
+        return user
+
+    def barge_in(self, cancel):
+        """The segmenter triggered on the user while SAGI speaks: stop the reply and hand over."""
+        times = [t for t in self.user_times if t is not None]
+        onset = min(times) if times else time.monotonic()
+        self.released = True # The echo tail must not cut the user's utterance short
+        if self.started_at is not None and self.stopped_at is None:
+            self.onset = onset # Timed when the player actually stops
+        else:
+            self.reactions.append(time.monotonic() - onset) # Between files, nothing audible to stop
+        cancel()
+        print("Barge-in: user interrupted, reply cancelled.")
+
+    def report(self):
+        if not self.reactions:
+            return f"Barge-in: none ({self.suppressed} echo frame(s) suppressed)."
+        reactions = sorted(self.reactions)
+        return (f"Barge-in: {len(reactions)} interruption(s), reaction median {1000 * reactions[len(reactions) // 2]:.0f} ms, "
+                f"max {1000 * reactions[-1]:.0f} ms ({self.suppressed} echo frame(s) suppressed)")
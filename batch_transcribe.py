@@ -0,0 +1,148 @@
+# Offline batch transcription of recorded sessions, spread over a process pool
+#
+#   python batch_transcribe.py recordings/                       # every WAV/raw file in the directory
+#   python batch_transcribe.py manifest.txt -o results.jsonl     # one path per line (or JSONL with "path")
+#   python batch_transcribe.py recordings/ --workers 1 2 4 --cpu-threads 2
+#
+# Each file is segmented with the same VAD settings as the live loop (batch_vad.segment_pcm)
+# and its utterances are transcribed by a worker process holding its own WhisperModel.
+# One JSON line per file is written as soon as that file is done, tagged with the pool size
+# ("workers") so the lines of a --workers 1 2 4 sweep can be told apart.
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import batch_vad
+from audio_capture import open_source, PCM_EXTENSIONS
+from adaptive_decode import DecodePolicy
+from model_loader import warm_up
+
+# --- Same configuration as speechreg.py ---
+MODEL_SIZE = "tiny.en"
+DEVICE = "cpu"
+COMPUTE_TYPE = "int8"
+RATE = batch_vad.RATE
+CHUNK_SIZE = batch_vad.CHUNK_SIZE
+VAD_AGGRESSIVENESS = batch_vad.VAD_AGGRESSIVENESS
+AUDIO_EXTENSIONS = ('.wav',) + PCM_EXTENSIONS
+
+# Per worker process, set up once by _init_worker
+worker_model = None
+worker_policy = None
+
+
+def list_audio_files(paths):
+    # Directories are scanned (sorted), .txt/.lst/.jsonl manifests are read, anything else is an audio file
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(AUDIO_EXTENSIONS))
+        elif path.lower().endswith(('.txt', '.lst', '.jsonl')):
+            base = os.path.dirname(path)
+            with open(path) as manifest:
+                for line in manifest:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    entry = json.loads(line)["path"] if path.lower().endswith('.jsonl') else line
+                    files.append(os.path.join(base, entry))
+        else:
+            files.append(path)
+    return files
+
+
+def _init_worker(model_size, device, compute_type, cpu_threads, warmup):
+    global worker_model, worker_policy
+    sys.stdout = sys.stderr # Progress prints (warm-up etc.) must not end up in the JSONL on stdout
+    from faster_whisper import WhisperModel
+    worker_model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+    worker_policy = DecodePolicy()
+    if warmup:
+        warm_up(worker_model)
+
+
+def transcribe_file(path):
+    # Runs in a worker: VAD-segment one file, then decode each utterance
+    start = time.time()
+    source = open_source(path, rate=RATE, frame_size=CHUNK_SIZE)
+    samples = source.samples
+    segments, _, _ = batch_vad.segment_pcm(samples, rate=RATE, frame_size=CHUNK_SIZE,
+                                           aggressiveness=VAD_AGGRESSIVENESS)
+    vad_time = time.time() - start
+
+    utterances = []
+    decode_time = 0.0
+    for (start_frame, end_frame), (start_s, end_s) in zip(segments, batch_vad.segment_times(segments)):
+        audio_np = samples[start_frame * CHUNK_SIZE:end_frame * CHUNK_SIZE].astype(np.float32) / 32768.0
+        decode_start = time.time()
+        text, path_taken, reason = worker_policy.decode(worker_model, audio_np)
+        elapsed = time.time() - decode_start
+        decode_time += elapsed
+        utterances.append({"start": round(start_s, 3), "end": round(end_s, 3), "text": text,
+                           "decode": path_taken, "decode_s": round(elapsed, 3)})
+    return {"path": path, "audio_s": round(source.duration(), 3), "utterances": utterances,
+            "vad_s": round(vad_time, 3), "decode_s": round(decode_time, 3),
+            "wall_s": round(time.time() - start, 3), "worker": os.getpid()}
+
+
+def run_batch(files, workers, cpu_threads, out, warmup=True):
+    """Transcribes `files` with `workers` processes, writing JSONL to `out`. Returns (audio_s, wall_s, failed)."""
+    start = time.time()
+    total_audio = 0.0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(MODEL_SIZE, DEVICE, COMPUTE_TYPE, cpu_threads, warmup)) as pool:
+        futures = {pool.submit(transcribe_file, path): path for path in files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                result = {"path": futures[future], "error": str(e)}
+            else:
+                total_audio += result["audio_s"]
+            result["workers"] = workers # Which run of a --workers sweep this line belongs to
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    return total_audio, time.time() - start, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel offline transcription of recorded sessions.")
+    parser.add_argument("inputs", nargs="+", help="Audio files, directories, or manifests (.txt/.lst/.jsonl)")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1],
+                        help="Worker process count(s); several values run the batch once per count")
+    parser.add_argument("--cpu-threads", type=int, default=1,
+                        help="CTranslate2 threads per worker (workers x cpu_threads should not exceed the cores)")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the per-worker model warm-up")
+    args = parser.parse_args()
+
+    files = list_audio_files(args.inputs)
+    if not files:
+        print("No audio files found.", file=sys.stderr)
+        sys.exit(1)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    report = []
+    for workers in args.workers:
+        print(f"Transcribing {len(files)} file(s) with {workers} worker(s) x {args.cpu_threads} thread(s)...",
+              file=sys.stderr)
+        total_audio, wall, failed = run_batch(files, workers, args.cpu_threads, out, warmup=not args.no_warmup)
+        report.append((workers, total_audio, wall, failed))
+    if out is not sys.stdout:
+        out.close()
+
+    # Wall time includes starting the pool and loading one model per worker
+    print(f"\n{'workers':>7} {'audio s':>9} {'wall s':>8} {'RTF':>7} {'x realtime':>10} {'files/s':>8} {'failed':>6}",
+          file=sys.stderr)
+    for workers, total_audio, wall, failed in report:
+        rtf = wall / total_audio if total_audio else float("nan")
+        print(f"{workers:>7} {total_audio:>9.1f} {wall:>8.2f} {rtf:>7.3f} {total_audio / wall:>10.1f} "
+              f"{len(files) / wall:>8.2f} {failed:>6}", file=sys.stderr)
@@ -0,0 +1,140 @@
+import numpy as np
+import webrtcvad
+from numpy.lib.stride_tricks import as_strided
+from endpointer import AdaptiveEndpointer
+from segmenter import SpeechSegmenter, SPEECH_END
+from utterance_buffer import UtteranceBuffer
+
+# --- Batch VAD Configuration (same values as main.py / speechreg.py) ---
+RATE = 16000
+FRAME_DURATION_MS = 30
+CHUNK_SIZE = int(RATE * FRAME_DURATION_MS / 1000)
+VAD_AGGRESSIVENESS = 3
+
+# Frames below these levels are "obvious silence" and can skip webrtcvad.
+# Kept conservative on purpose: webrtcvad itself calls anything this quiet non-speech,
+# and we only gate loud-ish frames when they look like broadband hiss (very high ZCR).
+SILENCE_RMS = 40     # ~ -58 dBFS, room tone / digital silence
+NOISE_RMS = 120      # ~ -49 dBFS, still too quiet to be someone talking to the assistant
+NOISE_ZCR = 0.55     # Fraction of sign changes per sample, speech stays well below this
+# webrtcvad adapts its noise model on every frame it sees, so the quiet frames right
+# before speech still go through it; otherwise onsets can move by a frame.
+CONTEXT_FRAMES = 20  # 600 ms
+
+
+def frame_signal(samples, frame_size=CHUNK_SIZE):
+    """
+    Splits an int16 PCM buffer into non-overlapping frames without copying.
+    A trailing partial frame is dropped, like the live path does.
+    """
+    samples = np.ascontiguousarray(samples, dtype=np.int16)
+    num_frames = len(samples) // frame_size
+    return as_strided(samples, shape=(num_frames, frame_size),
+                      strides=(frame_size * samples.itemsize, samples.itemsize),
+                      writeable=False)
+
+
+def frame_rms(frames):
+    as_float = frames.astype(np.float32)
+    return np.sqrt(np.einsum('ij,ij->i', as_float, as_float) / frames.shape[1])
+
+
+def frame_zcr(frames):
+    # Fraction of adjacent samples that change sign
+    negative = frames < 0
+    return np.count_nonzero(negative[:, 1:] != negative[:, :-1], axis=1) / (frames.shape[1] - 1)
+
+
+def obvious_silence(frames, silence_rms=SILENCE_RMS, noise_rms=NOISE_RMS, noise_zcr=NOISE_ZCR,
+                    context_frames=CONTEXT_FRAMES):
+    """
+    Boolean mask of frames that don't need webrtcvad: quiet (or quiet and hiss-like)
+    and more than `context_frames` before the next frame that isn't.
+    """
+    rms = frame_rms(frames)
+    quiet = rms < silence_rms
+    # ZCR only matters in the band between "certainly quiet" and "too loud to gate"
+    band = np.flatnonzero(~quiet & (rms < noise_rms))
+    quiet[band] = frame_zcr(frames[band]) > noise_zcr
+    # Index of the next non-quiet frame at or after each frame (past the end if there is none)
+    index = np.arange(len(frames))
+    next_loud = np.where(quiet, len(frames) + context_frames, index)
+    next_loud = np.minimum.accumulate(next_loud[::-1])[::-1]
+    return quiet & (next_loud - index > context_frames)
+
+
+def _run_ends(mask):
+    # For every True position, the (exclusive) end of the run of Trues it belongs to
+    index = np.arange(len(mask))
+    ends = np.where(mask, len(mask), index)
+    return np.minimum.accumulate(ends[::-1])[::-1]
+
+
+def segment_pcm(samples, rate=RATE, frame_size=CHUNK_SIZE, aggressiveness=VAD_AGGRESSIVENESS, gate=True,
+                segmenter=None, **gate_levels):
+    """
+    Runs the same SpeechSegmenter state machine as the live loop (segmenter.record_utterance)
+    over a whole PCM buffer and returns (segments, is_speech, vad_calls).
+
+    segments  - list of (start_frame, end_frame) utterances, end exclusive, in the
+                same places the live loop would start and stop recording
+    is_speech - per-frame VAD decision (gated frames count as non-speech)
+    vad_calls - how many frames actually went through webrtcvad
+
+    Like the live path, every utterance gets a fresh webrtcvad.Vad. With gate=True
+    obvious silence is decided from vectorized features instead of webrtcvad;
+    bench_vad.py checks that the timeline still matches gate=False.
+    """
+    samples = np.ascontiguousarray(samples, dtype=np.int16)
+    frames = frame_signal(samples, frame_size)
+    num_frames = len(frames)
+    # webrtcvad gets memoryview slices of the one buffer, cheaper than a numpy view per frame
+    pcm = memoryview(samples).cast('B')
+    frame_bytes = frame_size * samples.itemsize
+    if gate:
+        silent_mask = obvious_silence(frames, **gate_levels)
+        silent = silent_mask.tolist()
+        run_end = _run_ends(silent_mask).tolist()
+    else:
+        silent = [False] * num_frames
+    is_speech = [False] * num_frames # Plain list, per-element numpy access is slow in this loop
+    if segmenter is None:
+        # Timeline only, so the utterance buffer never receives audio
+        segmenter = SpeechSegmenter(UtteranceBuffer(initial_seconds=0), AdaptiveEndpointer(),
+                                    frame_size=frame_size, frame_duration_ms=frame_size * 1000 // rate)
+
+    segments = []
+    vad_calls = 0
+    i = 0
+    while i < num_frames:
+        is_speech_call = webrtcvad.Vad(aggressiveness).is_speech
+        segmenter.reset()
+        turn_start = i
+        speech = True     # A fresh Vad must see at least one frame before we start gating
+        ended = False
+        while i < num_frames:
+            if silent[i] and not speech:
+                # Only once webrtcvad has said "no" itself: right after speech it keeps
+                # answering "yes" for a few frames of hangover no matter how quiet they are
+                if not segmenter.triggered:
+                    # Nothing can trigger inside a gated run, jump over all of it
+                    segmenter.skip_silence(run_end[i] - i)
+                    i = run_end[i]
+                    continue
+                speech = False
+            else:
+                speech = is_speech_call(pcm[i * frame_bytes:(i + 1) * frame_bytes], rate)
+                vad_calls += 1
+            is_speech[i] = speech
+            i += 1
+            if segmenter.process(None, speech) == SPEECH_END:
+                ended = True
+                break
+        if ended or segmenter.finish():
+            segments.append((turn_start + segmenter.start_index, i))
+    return segments, np.array(is_speech, dtype=bool), vad_calls
+
+
+def segment_times(segments, frame_duration_ms=FRAME_DURATION_MS):
+    # (start_frame, end_frame) -> (start_seconds, end_seconds)
+    return [(s * frame_duration_ms / 1000.0, e * frame_duration_ms / 1000.0) for s, e in segments]
@@ -0,0 +1,121 @@
+# Accuracy harness + benchmark for the fuzzy intent fallback (intents.FuzzyIntentClassifier)
+#
+#   python bench_fuzzy_intents.py                     # 20 corrupted variants per test phrase
+#   python bench_fuzzy_intents.py --variants 50 --seed 1 --queries 50000
+#
+# Held-out phrasings of every intent (not the classifier's own examples) are corrupted the
+# way Whisper tiny.en mishears short commands: dropped or swapped letters, homophones,
+# split or merged words. Reports how many the exact matcher alone and exact + fuzzy get
+# right, how often out-of-domain requests are wrongly given an intent, a threshold sweep,
+# and queries/s for one-at-a-time and batched scoring.
+
+import time
+import random
+import argparse
+
+from intents import IntentMatcher, FuzzyIntentClassifier, MIN_FUZZY_SCORE
+
+# Held-out phrasings, none of them verbatim in intents.EXAMPLES
+TEST_PHRASES = {
+    "greeting": ("hey there", "hello there sagi", "hi sagi"),
+    "how_are_you": ("how are you doing today", "hey how's it going", "how are things"),
+    "time": ("could you tell me the time", "what time is it now", "time please"),
+    "date": ("what's today's date", "which day is it", "tell me the date"),
+    "identity": ("what should i call you", "tell me who you are", "what is your name again"),
+    "capabilities": ("what are you able to do", "can you help me", "what can you do for me"),
+    "goodbye": ("goodbye", "bye for now", "see you soon", "okay quit"),
+    "thanks": ("thank you sagi", "thanks so much", "okay thank you"),
+    "weather": ("how is the weather", "what's the weather like today", "weather forecast"),
+    "fact": ("tell me something cool", "give me a fact", "any interesting facts"),
+}
+# Requests SAGI has no intent for: these must stay unmatched (the fallback reply)
+OUT_OF_DOMAIN = ("play some music", "open the door", "set an alarm for seven", "turn on the lights",
+                 "call my mother", "what is love", "send a message to john", "order a pizza",
+                 "how tall is mount everest", "read my email", "start a timer", "is it going to rain",
+                 "translate this to french", "volume up", "next song", "where am i")
+# Word-level mishearings typical for a small ASR model on short commands
+HOMOPHONES = {"time": "tie", "bye": "by", "goodbye": "good by", "you": "ya", "your": "you're",
+              "what's": "what", "weather": "whether", "thanks": "thank", "thank": "tank",
+              "hello": "hollow", "hi": "high", "date": "day", "name": "nay", "fact": "fat",
+              "what": "wat", "the": "a", "help": "health", "are": "our", "see": "sea"}
+
+
+def corrupt(phrase, rng):
+    # One to two ASR-style errors
+    words = phrase.split()
+    for _ in range(rng.randint(1, 2)):
+        kind = rng.random()
+        i = rng.randrange(len(words))
+        word = words[i]
+        if kind < 0.35 and word in HOMOPHONES:
+            words[i] = HOMOPHONES[word]
+        elif kind < 0.55 and len(word) > 3:
+            j = rng.randrange(1, len(word))
+            words[i] = word[:j] + word[j + 1:] # Dropped letter
+        elif kind < 0.7 and len(word) > 3:
+            j = rng.randrange(1, len(word) - 1)
+            words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:] # Swapped letters
+        elif kind < 0.85 and i + 1 < len(words):
+            words[i:i + 2] = [word + words[i + 1]] # Merged words
+        elif len(word) > 5:
+            j = rng.randrange(2, len(word) - 2)
+            words[i:i + 1] = [word[:j], word[j:]] # Split word
+    return " ".join(words)
+
+
+def build_cases(variants, seed):
+    rng = random.Random(seed)
+    cases = []
+    for intent, phrases in TEST_PHRASES.items():
+        for phrase in phrases:
+            cases.append((phrase, intent))
+            cases += [(corrupt(phrase, rng), intent) for _ in range(variants)]
+    return cases
+
+
+def evaluate(cases, exact, fuzzy):
+    correct_exact = correct_both = 0
+    for query, intent in cases:
+        found = exact.match(query)
+        correct_exact += found == intent
+        if found is None:
+            found, _ = fuzzy.classify(query)
+        correct_both += found == intent
+    false_positives = sum((exact.match(query) or fuzzy.classify(query)[0]) is not None for query in OUT_OF_DOMAIN)
+    return correct_exact / len(cases), correct_both / len(cases), false_positives
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzzy intent accuracy on corrupted transcripts, and throughput.")
+    parser.add_argument("--variants", type=int, default=20, help="Corrupted variants per test phrase")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=20000, help="Queries for the throughput run")
+    args = parser.parse_args()
+
+    exact = IntentMatcher()
+    fuzzy = FuzzyIntentClassifier()
+    cases = build_cases(args.variants, args.seed)
+    print(f"{len(cases)} test transcripts ({sum(len(p) for p in TEST_PHRASES.values())} phrasings x "
+          f"{args.variants} corruptions + clean), {len(OUT_OF_DOMAIN)} out-of-domain requests, "
+          f"{fuzzy.matrix.shape[0]} examples x {fuzzy.matrix.shape[1]} n-grams\n")
+
+    print(" threshold   exact only   exact + fuzzy   out-of-domain matched")
+    for min_score in (0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.7):
+        fuzzy.min_score = min_score
+        exact_acc, both_acc, false_positives = evaluate(cases, exact, fuzzy)
+        marker = "  <- MIN_FUZZY_SCORE" if min_score == MIN_FUZZY_SCORE else ""
+        print(f"   {min_score:.2f}      {100 * exact_acc:6.1f}%       {100 * both_acc:6.1f}%          "
+              f"{false_positives:2d}/{len(OUT_OF_DOMAIN)}{marker}")
+
+    fuzzy.min_score = MIN_FUZZY_SCORE
+    rng = random.Random(args.seed)
+    queries = [rng.choice(cases)[0] for _ in range(args.queries)]
+    start = time.perf_counter()
+    for query in queries:
+        fuzzy.classify(query)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    fuzzy.classify_many(queries)
+    batch = time.perf_counter() - start
+    print(f"\nclassify()       {len(queries) / single:10,.0f} queries/s  ({1e6 * single / len(queries):.0f} us each)")
+    print(f"classify_many()  {len(queries) / batch:10,.0f} queries/s")
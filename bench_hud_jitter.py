@@ -0,0 +1,138 @@
+# Benchmark: HUD frame-time jitter while Whisper decodes, in-process vs asr_worker process
+#
+#   python bench_hud_jitter.py                    # 10 s per mode, synthetic 4 s utterance
+#   python bench_hud_jitter.py --seconds 20 rec.wav
+#
+# A 60 FPS render loop (offscreen pygame drawing like main.py's HUD, or an equivalent pure
+# Python workload without pygame) runs while a background thread decodes back to back,
+# once with the model in this process and once through ASRWorkerProcess.
+
+import os
+import sys
+import math
+import time
+import argparse
+import threading
+import numpy as np
+
+from model_loader import ModelLoader, warmup_audio
+from audio_capture import open_source
+
+FPS = 60
+WIDTH, HEIGHT = 1200, 900
+MODEL_SIZE = "tiny.en"
+DEVICE = "cpu"
+COMPUTE_TYPE = "int8"
+
+try:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+except ImportError:
+    pygame = None
+
+
+def make_renderer():
+    if pygame is not None:
+        pygame.init()
+        screen = pygame.Surface((WIDTH, HEIGHT))
+        center = (WIDTH - WIDTH // 4, HEIGHT // 2)
+
+        def render(rotation):
+            # Same kind of work as main.py's HUD: full-size alpha layers, rings, dots, arcs
+            screen.fill((10, 10, 10))
+            for radius in (160, 200, 250, 300):
+                layer = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+                pygame.draw.circle(layer, (0, 255, 255, 200), center, radius, width=2)
+                screen.blit(layer, (0, 0))
+            for i in range(140):
+                angle = i * 2 * math.pi / 140 + rotation
+                pygame.draw.circle(screen, (150, 150, 150), (int(center[0] + 280 * math.cos(angle)),
+                                                             int(center[1] + 280 * math.sin(angle))), 2)
+            for i in range(4):
+                rect = pygame.Rect(0, 0, (200 + i * 30) * 2, (200 + i * 30) * 2)
+                rect.center = center
+                pygame.draw.arc(screen, (200, 200, 200), rect, rotation * (i + 1), rotation * (i + 1) + 2.5, 4)
+        return render, "pygame offscreen HUD"
+
+    def render(rotation):
+        # Without pygame: the per-frame Python geometry of the HUD, a few thousand trig calls
+        total = 0.0
+        for i in range(3000):
+            angle = i * 0.002 + rotation
+            total += math.cos(angle) * 280 + math.sin(angle) * 280
+        return total
+    return render, "pure Python HUD geometry (pygame not installed)"
+
+
+def run_loop(render, seconds):
+    # Fixed-rate loop like clock.tick(FPS); returns the frame-to-frame times in ms
+    budget = 1.0 / FPS
+    times = []
+    rotation = 0.0
+    deadline = time.perf_counter()
+    previous = deadline
+    end = deadline + seconds
+    while previous < end:
+        render(rotation)
+        rotation += 0.02
+        deadline += budget
+        pause = deadline - time.perf_counter()
+        if pause > 0:
+            time.sleep(pause)
+        else:
+            deadline = time.perf_counter() # Fell behind, don't try to catch up with a burst
+        now = time.perf_counter()
+        times.append((now - previous) * 1000.0)
+        previous = now
+    return np.array(times)
+
+
+def decode_continuously(model, audio_np, stop, counter):
+    while not stop.is_set():
+        segments, info = model.transcribe(audio_np, beam_size=5)
+        list(segments)
+        counter[0] += 1
+
+
+def measure(label, render, seconds, model=None, audio_np=None):
+    stop = threading.Event()
+    counter = [0]
+    thread = None
+    if model is not None:
+        thread = threading.Thread(target=decode_continuously, args=(model, audio_np, stop, counter), daemon=True)
+        thread.start()
+    times = run_loop(render, seconds)
+    stop.set()
+    if thread is not None:
+        thread.join()
+    budget = 1000.0 / FPS
+    late = np.count_nonzero(times > 1.5 * budget)
+    print(f"{label:<22} {len(times) / seconds:6.1f} fps  mean {times.mean():6.2f}  p50 {np.percentile(times, 50):6.2f}  "
+          f"p99 {np.percentile(times, 99):7.2f}  max {times.max():7.2f}  std {times.std():6.2f} ms  "
+          f"late {100.0 * late / len(times):5.1f}%  decodes {counter[0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HUD frame-time jitter with in-process vs worker-process ASR.")
+    parser.add_argument("clip", nargs="?", help="Utterance to decode repeatedly (default: 4 s synthetic)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Render time per mode")
+    args = parser.parse_args()
+
+    audio_np = (open_source(args.clip).samples.astype(np.float32) / 32768.0 if args.clip
+                else warmup_audio(4.0))
+    render, kind = make_renderer()
+    print(f"Render workload: {kind}, target {FPS} fps; decoding {len(audio_np) / 16000:.1f} s clips with beam_size=5\n")
+
+    measure("idle (no decoding)", render, args.seconds)
+
+    local = ModelLoader(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE).start()
+    try:
+        model = local.result()
+    except Exception:
+        sys.exit(1) # ModelLoader printed why
+    measure("decode in-process", render, args.seconds, model, audio_np)
+    del model
+
+    worker = ModelLoader(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE, worker_process=True).start().result()
+    measure("decode in worker", render, args.seconds, worker, audio_np)
+    worker.close()
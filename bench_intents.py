@@ -0,0 +1,87 @@
+# Benchmark: compiled intent matcher (intents.IntentMatcher) vs the old substring if/elif chain
+#
+#   python bench_intents.py                  # 200k synthetic queries
+#   python bench_intents.py --queries 1000000 --seed 3
+#
+# Queries mix filler words, intent phrases and words that only contain an intent phrase
+# ("this", "maybe", "sometimes"...). Prints queries/s for both matchers and how often they
+# disagree, with a few examples of where the substring chain misfires.
+
+import time
+import random
+import argparse
+
+from intents import INTENTS, IntentMatcher
+
+FILLER = ("please", "can", "you", "tell", "me", "the", "a", "what", "is", "it", "now", "sagi", "um",
+          "so", "and", "about", "right", "just", "really", "of", "in", "for", "my", "today")
+# Words that contain an intent phrase without meaning it
+TRAPS = ("this", "which", "chip", "they", "maybe", "lifetime", "sometimes", "update", "candidate",
+         "facts", "history", "shipping", "abide", "exited", "quite", "token", "broken", "hilarious",
+         "thinking", "weathered", "look", "cheeky")
+
+
+def legacy_intent(query):
+    # The if/elif chain get_sagi_response() used before intents.py, reduced to the intent it picked
+    query = query.lower()
+    if any(phrase in query for phrase in ["hello", "hi", "hey"]):
+        return "greeting"
+    elif any(phrase in query for phrase in ["how are you", "how are you doing", "what's up"]):
+        return "how_are_you"
+    elif "time" in query:
+        return "time"
+    elif any(phrase in query for phrase in ["date", "today's date"]):
+        return "date"
+    elif any(phrase in query for phrase in ["your name", "who are you"]):
+        return "identity"
+    elif any(phrase in query for phrase in ["what can you do", "help me", "your capabilities"]):
+        return "capabilities"
+    elif any(phrase in query for phrase in ["goodbye", "bye", "exit", "quit", "see you"]):
+        return "goodbye"
+    elif any(phrase in query for phrase in ["thank you", "thanks", "ok", "okay"]):
+        return "thanks"
+    elif "weather" in query:
+        return "weather"
+    elif "fact" in query or "tell me something" in query:
+        return "fact"
+    return None
+
+
+def synthetic_queries(count, seed=0):
+    rng = random.Random(seed)
+    phrases = [phrase for _, group in INTENTS for phrase in group]
+    queries = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(2, 8))
+        if rng.random() < 0.3:
+            words.insert(rng.randint(0, len(words)), rng.choice(TRAPS))
+        if rng.random() < 0.7:
+            words.insert(rng.randint(0, len(words)), rng.choice(phrases))
+        queries.append(" ".join(words))
+    return queries
+
+
+def timed(match, queries):
+    start = time.perf_counter()
+    results = [match(query) for query in queries]
+    return results, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Intent matching throughput and misfires, old chain vs compiled regex.")
+    parser.add_argument("--queries", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    queries = synthetic_queries(args.queries, args.seed)
+    matcher = IntentMatcher()
+    legacy, legacy_s = timed(legacy_intent, queries)
+    compiled, compiled_s = timed(matcher.match, queries)
+    print(f"{len(queries)} queries, {sum(len(q) for q in queries) / len(queries):.0f} chars on average\n")
+    print(f"substring chain   {len(queries) / legacy_s:12,.0f} queries/s  ({1e6 * legacy_s / len(queries):.2f} us each)")
+    print(f"compiled regex    {len(queries) / compiled_s:12,.0f} queries/s  ({1e6 * compiled_s / len(queries):.2f} us each)")
+
+    differ = [(query, old, new) for query, old, new in zip(queries, legacy, compiled) if old != new]
+    print(f"\nDifferent intent on {len(differ)} queries ({100.0 * len(differ) / len(queries):.1f}%), e.g.:")
+    for query, old, new in differ[:8]:
+        print(f"  {query!r:60}  chain: {old or '-':<13} compiled: {new or '-'}")
@@ -0,0 +1,101 @@
+# Benchmark: automation.QueryParser vs the per-call parsing process_user_query used to do
+#
+#   python bench_query_parser.py                   # 100k synthetic queries
+#   python bench_query_parser.py --queries 20000 --seed 2
+#
+# The old code rebuilt the provider dict and the removal regex and ran re.sub with inline
+# patterns on every call; the copy below is that code minus printing and the browser.
+
+import re
+import time
+import random
+import argparse
+
+from automation import QueryParser, SEARCH_PROVIDERS, GENERAL_SEARCH_PHRASES
+
+TOPICS = ("the capital of france", "how to bake a cake", "latest tech news", "python asyncio tutorial",
+          "job openings in software development", "c++ & rust", "best pizza near me", "weather tomorrow",
+          "who won the match", "cheap flights to tokyo", "nvidia stock price", "50% off deals")
+TEMPLATES = ("search on {site} {topic}", "{topic} search in {site}", "see in {site} {topic}",
+             "find on {site} {topic}", "{site} search for {topic}", "search {site} for {topic}",
+             "look for {topic}", "please find {topic}", "can you check {topic}", "{topic}",
+             "what is {topic}", "lookup {topic} on {site}")
+
+
+def legacy_parse(user_input):
+    search_providers = dict(SEARCH_PROVIDERS)
+    general_search_phrases = list(GENERAL_SEARCH_PHRASES)
+    normalized_input = user_input.lower()
+    target_website = "google"
+    found_search_command = False
+    for site_name in search_providers.keys():
+        if f" on {site_name}" in normalized_input or f" in {site_name}" in normalized_input or \
+           f" {site_name} search for" in normalized_input or f" search {site_name} for" in normalized_input:
+            target_website = site_name
+            found_search_command = True
+            break
+    all_removal_patterns = [re.escape(phrase) for phrase in general_search_phrases]
+    for site_name in search_providers.keys():
+        all_removal_patterns += [re.escape(f" on {site_name}"), re.escape(f" in {site_name}"),
+                                 re.escape(f" {site_name} search for"), re.escape(f" search {site_name} for"),
+                                 re.escape(site_name)]
+    removal_regex = r'\b(?:' + '|'.join(all_removal_patterns) + r')\b'
+    temp_question = re.sub(removal_regex, '', normalized_input).strip()
+    temp_question = re.sub(r'^(?:please|can you|could you|what is|how to|where is|when did|who is)\s*', '',
+                           temp_question, flags=re.IGNORECASE).strip()
+    question = re.sub(r'^\W+|\W+$', '', temp_question).strip()
+    if not found_search_command and any(phrase in normalized_input for phrase in general_search_phrases):
+        for phrase in general_search_phrases:
+            if phrase in normalized_input:
+                parts = normalized_input.split(phrase, 1)
+                if len(parts) > 1:
+                    question = parts[1].strip()
+                    break
+        if not question and normalized_input:
+            question = normalized_input
+        question = re.sub(r'^\W+|\W+$', '', question).strip()
+        question = re.sub(r'^(?:please|can you|could you|what is|how to|where is|when did|who is)\s*', '',
+                          question, flags=re.IGNORECASE).strip()
+    elif not found_search_command and not question:
+        question = user_input.strip()
+    if not question:
+        return target_website, "", None
+    encoded = re.sub(r'\s+', '%20', question)
+    encoded = re.sub(r'[^\w\s-]', '', encoded)
+    return target_website, question, search_providers[target_website] % encoded.replace(" ", "%20")
+
+
+def synthetic_queries(count, seed=0):
+    rng = random.Random(seed)
+    sites = list(SEARCH_PROVIDERS)
+    return [rng.choice(TEMPLATES).format(site=rng.choice(sites), topic=rng.choice(TOPICS)) for _ in range(count)]
+
+
+def timed(parse, queries):
+    start = time.perf_counter()
+    results = [parse(query) for query in queries]
+    return results, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Query parsing throughput, per-call regex building vs QueryParser.")
+    arg_parser.add_argument("--queries", type=int, default=100000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    queries = synthetic_queries(args.queries, args.seed)
+    parser = QueryParser()
+    legacy, legacy_s = timed(legacy_parse, queries)
+    compiled, compiled_s = timed(parser.parse, queries)
+    print(f"{len(queries)} queries\n")
+    print(f"per-call parsing   {len(queries) / legacy_s:10,.0f} queries/s  ({1e6 * legacy_s / len(queries):.1f} us each)")
+    print(f"QueryParser        {len(queries) / compiled_s:10,.0f} queries/s  ({1e6 * compiled_s / len(queries):.1f} us each)")
+
+    providers = sum(old[0] != new[0] for old, new in zip(legacy, compiled))
+    questions = sum(old[1] != new[1] for old, new in zip(legacy, compiled))
+    print(f"\nDifferent provider on {providers} queries, different question on {questions}")
+    shown = set()
+    for query, old, new in zip(queries, legacy, compiled):
+        if (old[0] != new[0] or old[1] != new[1]) and query not in shown and len(shown) < 6:
+            shown.add(query)
+            print(f"  {query!r}\n      old: {old[0]}, {old[1]!r}\n      new: {new[0]}, {new[1]!r}")
@@ -0,0 +1,84 @@
+# Startup benchmark: the cold import time of every module, against a budget
+#
+#   python bench_startup.py                     # all modules below, 5 runs each
+#   python bench_startup.py main speechreg --runs 10
+#
+# Every import runs in a fresh interpreter under `python -X importtime`, and the module's
+# cumulative time (itself plus everything it imports) is read from that report; the median
+# of the runs is compared with the module's budget. The budgets cover the libraries a module
+# really needs (numpy, pygame, webrtcvad); loading a model, opening a window or an audio
+# device, starting threads or downloading data at import goes far over them. Exits with 1
+# if a module is over budget, modules whose dependencies aren't installed are only listed.
+
+import sys
+import argparse
+import statistics
+import subprocess
+
+# Cold import budget per module, in ms
+IMPORT_BUDGET_MS = {
+    "main": 700,
+    "speechreg": 500,
+    "test": 500,
+    "temp": 600,
+    "animation": 400,
+    "temp2": 400,
+    "initialise": 400,
+    "automation": 150,
+    "intents": 300,
+    "orchestrator": 400,
+    "tracing": 150,
+    "tts_pipeline": 200,
+    "tts_cache": 150,
+    "barge_in": 300,
+    "segmenter": 350,
+    "model_loader": 300,
+    "asr_service": 350,
+    "asr_worker": 350,
+    "batch_transcribe": 400,
+    "autotune": 400,
+}
+
+
+def import_time_ms(module):
+    # None (and the error) if the module can't be imported here
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "exit %d" % result.returncode
+    for line in reversed(result.stderr.splitlines()):
+        # "import time: self [us] | cumulative | imported package", the module itself isn't indented
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].rstrip() == f" {module}":
+            return int(line.split("|")[1]) / 1000, None
+    return None, "no importtime line"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold import time per module, against IMPORT_BUDGET_MS.")
+    parser.add_argument("modules", nargs="*", help="Modules to time (default: all with a budget)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module, the median counts")
+    args = parser.parse_args()
+
+    over = []
+    print(f"{'module':<18} {'median ms':>10} {'max ms':>8} {'budget':>8}")
+    for module in args.modules or IMPORT_BUDGET_MS:
+        budget = IMPORT_BUDGET_MS.get(module)
+        times = []
+        for _ in range(args.runs):
+            ms, error = import_time_ms(module)
+            if ms is None:
+                break
+            times.append(ms)
+        if not times:
+            print(f"{module:<18} {'-':>10} {'-':>8} {budget or '-':>8}  not importable here: {error}")
+            continue
+        median = statistics.median(times)
+        flag = ""
+        if budget is not None and median > budget:
+            over.append(module)
+            flag = "  OVER BUDGET"
+        print(f"{module:<18} {median:>10.0f} {max(times):>8.0f} {budget or '-':>8}{flag}")
+
+    if over:
+        print(f"\n{len(over)} module(s) over their import budget: {', '.join(over)}")
+        sys.exit(1)
@@ -0,0 +1,85 @@
+# Benchmark: live per-frame segmentation (segmenter.record_utterance) vs batch_vad.segment_pcm
+#
+#   python bench_vad.py                  # synthetic 10 minute session
+#   python bench_vad.py rec1.wav rec2.wav
+
+import io
+import sys
+import time
+import contextlib
+import numpy as np
+
+import batch_vad
+from audio_capture import ArraySource, open_source
+from endpointer import AdaptiveEndpointer
+from segmenter import SpeechSegmenter, record_utterance
+from utterance_buffer import UtteranceBuffer
+
+RATE = batch_vad.RATE
+CHUNK_SIZE = batch_vad.CHUNK_SIZE
+
+
+def synthetic_session(seconds=600, seed=0):
+    # Alternates "utterances" (voiced harmonics with syllable-rate modulation) with quiet room noise
+    rng = np.random.default_rng(seed)
+    out = []
+    total = 0
+    while total < seconds * RATE:
+        gap = int(rng.uniform(1.0, 8.0) * RATE) # The assistant mostly hears silence between commands
+        out.append(rng.normal(0, 8, gap))
+        length = int(rng.uniform(0.6, 3.0) * RATE)
+        t = np.arange(length) / RATE
+        f0 = rng.uniform(110, 220)
+        voice = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 12))
+        envelope = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)
+        out.append(voice * envelope * 4000 + rng.normal(0, 30, length))
+        total += gap + length
+    return np.clip(np.concatenate(out), -32768, 32767).astype(np.int16)
+
+
+def reference_segments(samples):
+    # The live path itself: record_utterance() reading frame by frame from a source
+    source = ArraySource(samples)
+    segmenter = SpeechSegmenter(UtteranceBuffer(), AdaptiveEndpointer())
+    segments = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not source.finished:
+            turn_start = source.position // CHUNK_SIZE
+            if record_utterance(source, segmenter):
+                segments.append((turn_start + segmenter.start_index, source.position // CHUNK_SIZE))
+    return segments
+
+
+def run(label, func, samples, num_frames, repeats=3):
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(samples)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"{label:<28} {elapsed:8.3f} s  {num_frames / elapsed:12,.0f} frames/s")
+    return result
+
+
+def bench(samples, name):
+    num_frames = len(samples) // CHUNK_SIZE
+    print(f"\n{name}: {len(samples) / RATE:.1f} s of audio, {num_frames} frames")
+    reference = run("per-frame loop (live)", reference_segments, samples, num_frames)
+    exact, _, exact_calls = run("batch, no gate", lambda x: batch_vad.segment_pcm(x, gate=False), samples, num_frames)
+    gated, _, gated_calls = run("batch, energy/ZCR gate", batch_vad.segment_pcm, samples, num_frames)
+    print(f"webrtcvad calls: {exact_calls} ungated, {gated_calls} gated "
+          f"({100.0 * (1 - gated_calls / max(exact_calls, 1)):.1f}% skipped)")
+    print(f"segments: reference={len(reference)} batch={len(exact)} gated={len(gated)}")
+    for label, segments in (("batch, no gate", exact), ("batch, energy/ZCR gate", gated)):
+        if segments == reference:
+            print(f"  {label}: timeline identical to the live loop")
+        else:
+            diffs = len(set(segments) ^ set(reference))
+            print(f"  {label}: TIMELINE DIFFERS ({diffs} segment boundaries)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            bench(open_source(path).samples, path)
+    else:
+        bench(synthetic_session(), "synthetic session")
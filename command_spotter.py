@@ -0,0 +1,106 @@
+import re
+import time
+from difflib import SequenceMatcher
+
+# --- Command Fast Path ---
+# Most turns are one of the few commands get_sagi_response() knows. Those are short, so
+# instead of an open (possibly beam-search) decode the utterance gets one capped greedy
+# pass, biased towards the command vocabulary through the prompt, and the result is
+# scored against the known phrases. A confident match is returned right away; anything
+# else falls through to normal transcription. If a streaming partial already covered the
+# whole utterance it is scored instead, and no decode runs at all.
+
+RATE = 16000
+MAX_COMMAND_SECONDS = 2.5   # Longer utterances go straight to open transcription
+MAX_COMMAND_TOKENS = 12     # Decoder steps for the fast pass, the longest phrase needs fewer
+MIN_MATCH_RATIO = 0.82      # difflib similarity to a known phrase needed for a hit
+MIN_AVG_LOGPROB = -0.7      # The fast decode itself must also be confident
+
+# Phrases per command, worded so get_sagi_response() routes them to the right answer
+COMMAND_PHRASES = {
+    "time": ["what time is it", "what's the time", "tell me the time", "time"],
+    "date": ["what's the date", "what is the date today", "today's date", "date"],
+    "exit": ["goodbye", "bye", "exit", "quit", "see you"],
+    "thanks": ["thank you", "thanks", "okay", "ok"],
+    "name": ["what's your name", "what is your name", "who are you"],
+}
+# Commands only taken on an exact (normalized) match: a near miss like "quiet" or "exits" would
+# otherwise be rewritten into "quit" / "exit" and end the session
+EXACT_COMMANDS = ("exit",)
+
+
+def normalize(text):
+    return " ".join(re.sub(r"[^a-z' ]+", " ", text.lower()).split())
+
+
+class CommandSpotter:
+    def __init__(self, phrases=COMMAND_PHRASES, max_seconds=MAX_COMMAND_SECONDS, max_tokens=MAX_COMMAND_TOKENS,
+                 min_ratio=MIN_MATCH_RATIO, min_avg_logprob=MIN_AVG_LOGPROB, rate=RATE, exact=EXACT_COMMANDS):
+        self.phrases = [(command, normalize(phrase)) for command, group in phrases.items() for phrase in group]
+        self.prompt = ", ".join(phrase for _, phrase in self.phrases) + "."
+        self.max_samples = int(max_seconds * rate)
+        self.max_tokens = max_tokens
+        self.min_ratio = min_ratio
+        self.exact = set(exact)
+        self.min_avg_logprob = min_avg_logprob
+        self.rate = rate
+        # Per-turn metrics
+        self.turns = 0
+        self.hits = 0
+        self.fast_seconds = 0.0      # Time spent in spot() over all turns
+        self.hit_audio = 0.0         # Audio seconds answered by the fast path
+        self.open_seconds = 0.0      # Open transcription time on misses...
+        self.open_audio = 0.0        # ...and the audio it covered, for the saving estimate
+
+    def match(self, text):
+        """Best (command, phrase, ratio) for `text`, or None if nothing is close enough."""
+        heard = normalize(text)
+        if not heard:
+            return None
+        best = max(((command, phrase, float(heard == phrase) if command in self.exact
+                     else SequenceMatcher(None, heard, phrase).ratio())
+                    for command, phrase in self.phrases), key=lambda item: item[2])
+        return best if best[2] >= self.min_ratio else None
+
+    def _fast_decode(self, model, audio_np):
+        # Greedy, single temperature (no fallback retries), few tokens, prompt lists the commands
+        segments, info = model.transcribe(audio_np, beam_size=1, temperature=0.0, max_new_tokens=self.max_tokens,
+                                          initial_prompt=self.prompt, condition_on_previous_text=False,
+                                          without_timestamps=True)
+        return list(segments)
+
+    def spot(self, model, audio_np, streamed_segments=None):
+        """
+        Returns the matched command phrase, or None to fall back to open transcription.
+        `streamed_segments` is a greedy result that already covers `audio_np`.
+        """
+        self.turns += 1
+        if len(audio_np) > self.max_samples:
+            return None
+        start = time.time()
+        segments = streamed_segments if streamed_segments is not None else self._fast_decode(model, audio_np)
+        confident = all(segment.avg_logprob >= self.min_avg_logprob for segment in segments)
+        found = self.match(" ".join(segment.text for segment in segments)) if segments and confident else None
+        self.fast_seconds += time.time() - start
+        if found is None:
+            return None
+        command, phrase, ratio = found
+        self.hits += 1
+        self.hit_audio += len(audio_np) / self.rate
+        print(f"Command fast path: '{phrase}' ({command}, match {ratio:.2f}) in {time.time() - start:.3f} seconds")
+        return phrase
+
+    def record_open(self, seconds, audio_np):
+        # Call after a miss with how long open transcription took
+        self.open_seconds += seconds
+        self.open_audio += len(audio_np) / self.rate
+
+    def report(self):
+        if not self.turns:
+            return "Command fast path: no turns."
+        line = f"Command fast path: {self.hits}/{self.turns} hits ({100.0 * self.hits / self.turns:.0f}%)"
+        if self.open_audio and self.hits:
+            # What the hits would have cost with open transcription, at the rate measured on misses
+            estimated = self.hit_audio * self.open_seconds / self.open_audio
+            line += f", ~{estimated - self.fast_seconds:.2f} s decode latency saved"
+        return line
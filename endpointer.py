@@ -0,0 +1,87 @@
+# --- Adaptive End-of-Speech Detection ---
+# The old rule stopped once >80% of a 500 ms window was unvoiced, so every turn waited
+# ~400 ms of silence. Here the required trailing silence (the "hangover") depends on the
+# utterance: short, solid commands end quickly, long or hesitant speech gets more room.
+
+FRAME_DURATION_MS = 30
+MIN_HANGOVER_MS = 240     # Floor for short, confidently complete commands (plosive gaps stay below this)
+MAX_HANGOVER_MS = 900     # Ceiling for long utterances with lots of pauses
+SHORT_UTTERANCE_MS = 1200 # Up to this much speech counts as a short command
+LONG_UTTERANCE_MS = 5000  # From here on the hangover is at its longest
+PAUSE_MS = 150            # A silence at least this long followed by more speech is a hesitation
+PAUSE_PENALTY_MS = 120    # Extra hangover per hesitation seen so far
+RESUME_FRAMES = 2         # Voiced frames in a row needed to count as "talking again" (ignores clicks)
+LEGACY_HANGOVER_MS = 13 * FRAME_DURATION_MS # What the fixed 80%-of-16-frames rule needed at best
+
+
+class AdaptiveEndpointer:
+    def __init__(self, frame_duration_ms=FRAME_DURATION_MS, min_hangover_ms=MIN_HANGOVER_MS,
+                 max_hangover_ms=MAX_HANGOVER_MS, short_utterance_ms=SHORT_UTTERANCE_MS,
+                 long_utterance_ms=LONG_UTTERANCE_MS, pause_ms=PAUSE_MS,
+                 pause_penalty_ms=PAUSE_PENALTY_MS, resume_frames=RESUME_FRAMES):
+        self.frame_duration_ms = frame_duration_ms
+        self.min_hangover_ms = min_hangover_ms
+        self.max_hangover_ms = max_hangover_ms
+        self.short_utterance_ms = short_utterance_ms
+        self.long_utterance_ms = long_utterance_ms
+        self.pause_ms = pause_ms
+        self.pause_penalty_ms = pause_penalty_ms
+        self.resume_frames = resume_frames
+        self.reset()
+
+    def reset(self):
+        # Call at the start of every utterance (i.e. when recording triggers)
+        self.voiced_frames = 0
+        self.total_frames = 0
+        self.silence_frames = 0  # Trailing silence so far
+        self.voiced_run = 0      # Consecutive voiced frames (only relevant inside a silence)
+        self.pauses = 0
+        self.endpoint_delay_ms = None
+
+    def hangover_ms(self):
+        # Trailing silence needed right now to call the utterance finished
+        speech_ms = self.voiced_frames * self.frame_duration_ms
+        span = max(self.long_utterance_ms - self.short_utterance_ms, 1)
+        length_factor = min(max((speech_ms - self.short_utterance_ms) / span, 0.0), 1.0)
+        # Choppy speech (low voiced ratio) is less likely to be a finished sentence
+        voiced_ratio = self.voiced_frames / max(self.total_frames - self.silence_frames, 1)
+        doubt = min(max(1.0 - voiced_ratio, 0.0), 1.0)
+        hangover = (self.min_hangover_ms
+                    + (self.max_hangover_ms - self.min_hangover_ms) * max(length_factor, doubt)
+                    + self.pauses * self.pause_penalty_ms)
+        return min(hangover, self.max_hangover_ms)
+
+    def update(self, is_speech):
+        """Feed one frame's VAD decision. Returns True once the utterance has ended."""
+        self.total_frames += 1
+        if is_speech:
+            self.voiced_run += 1
+            if not self.silence_frames:
+                self.voiced_frames += 1
+            elif self.voiced_run < self.resume_frames:
+                # A lone click inside the silence still counts as silence for now
+                self.silence_frames += 1
+            else:
+                # Talking again, a long enough gap before this was a hesitation
+                gap_frames = self.silence_frames - (self.voiced_run - 1)
+                if gap_frames * self.frame_duration_ms >= self.pause_ms:
+                    self.pauses += 1
+                self.voiced_frames += self.voiced_run
+                self.silence_frames = 0
+            return False
+
+        self.voiced_run = 0
+        self.silence_frames += 1
+        if self.silence_frames * self.frame_duration_ms >= self.hangover_ms():
+            self.endpoint_delay_ms = self.silence_frames * self.frame_duration_ms
+            return True
+        return False
+
+    def report(self):
+        # One line per turn so the saving against the fixed rule shows up in the logs
+        if self.endpoint_delay_ms is None:
+            return "Endpoint: utterance ended without trailing silence."
+        saved = LEGACY_HANGOVER_MS - self.endpoint_delay_ms
+        return (f"Endpoint after {self.endpoint_delay_ms} ms of silence "
+                f"({self.voiced_frames * self.frame_duration_ms} ms speech, {self.pauses} pause(s), "
+                f"{saved} ms saved vs fixed rule)")
@@ -7,13 +7,9 @@ import random
 import time
 import subprocess
 
-# Initialize Pygame
-pygame.init()
-
 # Screen settings
 WIDTH, HEIGHT = 800, 300
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("System Initialization Animation")
+SCREEN = None # Opened by init_display() from main(), importing this module doesn't open a window
 
 # Colors
 BLACK = (0, 0, 0)
@@ -22,7 +18,14 @@ CYAN = (0, 255, 255)
 DARK_BLUE = (10, 50, 80)
 
 # Fonts
-font = pygame.font.SysFont("Consolas", 38, bold=True)
+font = None # Needs pygame.init(), loaded by init_display()
+
+def init_display():
+    global SCREEN, font
+    pygame.init()
+    SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("System Initialization Animation")
+    font = pygame.font.SysFont("Consolas", 38, bold=True)
 
 def draw_segmented_progress_bar(surface, x, y, width, height, segments, filled_segments):
     segment_width = width // segments
@@ -34,6 +37,7 @@ def draw_segmented_progress_bar(surface, x, y, width, height, segments, filled_s
         pygame.draw.rect(surface, WHITE, rect, 2)
 
 def main():
+    init_display()
     running = True
     progress = 0
     max_segments = 20
@@ -0,0 +1,164 @@
+import re
+import numpy as np
+
+# --- Intent Matching ---
+# get_sagi_response() used to walk an if/elif chain of `phrase in query` checks: one scan of
+# the query per phrase, and substring hits inside other words ("this" is a greeting because
+# of "hi", "maybe" says goodbye...). All phrases are compiled into one alternation regex with
+# word boundaries on both sides, so a single finditer() pass finds every intent in the query
+# (the matched phrase maps back to its intent through a dict; named groups per intent
+# measured ~40% slower). When several are present, the earliest intent in INTENTS wins
+# (the order the old chain checked them in).
+
+# (intent, phrases), highest priority first
+INTENTS = (
+    ("greeting", ("hello", "hi", "hey")),
+    ("how_are_you", ("how are you", "how are you doing", "what's up")),
+    ("time", ("time",)),
+    ("date", ("date", "today's date")),
+    ("identity", ("your name", "who are you")),
+    ("capabilities", ("what can you do", "help me", "your capabilities")),
+    ("goodbye", ("goodbye", "bye", "exit", "quit", "see you")),
+    ("thanks", ("thank you", "thanks", "ok", "okay")),
+    ("weather", ("weather",)),
+    ("fact", ("fact", "tell me something")),
+)
+
+
+def compile_intents(intents=INTENTS):
+    # Longest phrases first, so "how are you doing" isn't cut short at "how are you"
+    phrases = sorted({phrase for _, group in intents for phrase in group}, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in phrases) + r")\b")
+
+
+class IntentMatcher:
+    """
+    Exact (whole-word) phrase matching. With `fuzzy` (a FuzzyIntentClassifier), queries that
+    match no phrase fall back to it instead of coming back empty.
+    """
+
+    def __init__(self, intents=INTENTS, fuzzy=None):
+        self.pattern = compile_intents(intents)
+        self.fuzzy = fuzzy
+        self.priority = {name: rank for rank, (name, _) in enumerate(intents)}
+        self.intent_of = {}
+        for name, phrases in reversed(intents): # A phrase listed twice belongs to the higher-priority intent
+            self.intent_of.update((phrase, name) for phrase in phrases)
+
+    def find_all(self, query, fuzzy=True):
+        """Every intent mentioned in `query`, in priority order. fuzzy=False: exact phrases only."""
+        found = {self.intent_of[match.group()] for match in self.pattern.finditer(query.lower())}
+        if not found and fuzzy:
+            intent = self._fuzzy(query)
+            return [intent] if intent else []
+        return sorted(found, key=self.priority.__getitem__)
+
+    def match(self, query):
+        """The highest-priority intent in `query`, or None."""
+        best = None
+        for match in self.pattern.finditer(query.lower()):
+            intent = self.intent_of[match.group()]
+            if best is None or self.priority[intent] < self.priority[best]:
+                best = intent
+        return best if best is not None else self._fuzzy(query)
+
+    def _fuzzy(self, query):
+        if self.fuzzy is None:
+            return None
+        intent, score = self.fuzzy.classify(query)
+        if intent:
+            print(f"Fuzzy intent: '{query}' -> {intent} ({score:.2f})")
+        return intent
+
+
+# --- Fuzzy Fallback ---
+# Whisper tiny.en mishears commands ("what's the tie", "good by"); no phrase matches and the
+# user has to repeat the whole turn. Queries without an exact match are compared against
+# example phrasings of every intent as character n-gram TF-IDF vectors: the examples are
+# precomputed into one L2-normalized matrix, so scoring a query is one matrix-vector product.
+# The best example's intent is taken if its cosine similarity clears MIN_FUZZY_SCORE.
+
+NGRAM_SIZES = (2, 3, 4)
+MIN_FUZZY_SCORE = 0.4 # Picked with bench_fuzzy_intents.py: most mishearings recovered, ~no out-of-domain hits
+FILLER_WORDS = {"please", "sagi", "now", "so", "just", "um", "uh"} # Say nothing about the intent
+# Whole-sentence phrasings per intent, on top of the INTENTS phrases
+EXAMPLES = {
+    "greeting": ("hello sagi", "hi there", "hey sagi", "good morning", "good evening"),
+    "how_are_you": ("how are you today", "how's it going", "how have you been"),
+    "time": ("what time is it", "what's the time", "tell me the time", "what's the time now", "current time"),
+    "date": ("what's the date", "what is the date today", "what day is it today", "which date is it"),
+    "identity": ("what's your name", "what is your name", "who are you", "tell me your name"),
+    "capabilities": ("what can you do", "what can you help me with", "what are your capabilities"),
+    "goodbye": ("goodbye sagi", "bye bye", "see you later", "exit please", "quit now"),
+    "thanks": ("thank you so much", "thanks a lot", "okay thanks"),
+    "weather": ("what's the weather", "how's the weather today", "what is the weather like"),
+    "fact": ("tell me a fact", "tell me something interesting", "give me a fun fact"),
+}
+
+_non_word = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize(text):
+    # Apostrophes and punctuation go, so "whats" and "what's" are the same; so do filler words
+    return " ".join(word for word in _non_word.sub("", text.lower()).split() if word not in FILLER_WORDS)
+
+
+def ngrams(text, sizes=NGRAM_SIZES):
+    # N-grams of the words, and of the text without spaces, so "good by" is close to "goodbye"
+    words = normalize(text)
+    padded = f" {words} "
+    joined = words.replace(" ", "")
+    return ([padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1)]
+            + [joined[i:i + n] for n in sizes for i in range(len(joined) - n + 1)])
+
+
+class FuzzyIntentClassifier:
+    def __init__(self, intents=INTENTS, examples=EXAMPLES, min_score=MIN_FUZZY_SCORE, sizes=NGRAM_SIZES):
+        self.min_score = min_score
+        self.sizes = sizes
+        phrases = [(name, phrase) for name, group in intents for phrase in group]
+        phrases += [(name, phrase) for name, group in examples.items() for phrase in group]
+        self.labels = [name for name, _ in phrases]
+        documents = [ngrams(phrase, sizes) for _, phrase in phrases]
+        self.vocabulary = {}
+        for grams in documents:
+            for gram in grams:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+        counts = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, grams in enumerate(documents):
+            for gram in grams:
+                counts[row, self.vocabulary[gram]] += 1
+        frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(documents)) / (1 + frequency)) + 1).astype(np.float32)
+        self.unknown_idf = float(np.log(1 + len(documents)) + 1) # An n-gram no example has
+        matrix = counts * self.idf
+        self.matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    def vector(self, query):
+        # TF-IDF of the query over the known n-grams, normalized including the unknown ones
+        grams = ngrams(query, self.sizes)
+        known = [index for index in map(self.vocabulary.get, grams) if index is not None]
+        unknown = len(grams) - len(known)
+        vector = np.bincount(known, minlength=len(self.vocabulary)).astype(np.float32) * self.idf
+        norm = np.sqrt(float(vector @ vector) + unknown * self.unknown_idf ** 2)
+        return vector / norm if norm else vector
+
+    def scores(self, query):
+        """Cosine similarity of `query` to every example phrase."""
+        return self.matrix @ self.vector(query)
+
+    def classify(self, query):
+        """(intent, score) of the closest example, intent None below min_score."""
+        scores = self.scores(query)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        return (self.labels[best] if score >= self.min_score else None), score
+
+    def classify_many(self, queries):
+        # Batch version for benchmarks / offline runs: one matrix-matrix product
+        vectors = np.stack([self.vector(query) for query in queries])
+        scores = vectors @ self.matrix.T
+        best = scores.argmax(axis=1)
+        top = scores[np.arange(len(queries)), best]
+        return [(self.labels[index] if score >= self.min_score else None, float(score))
+                for index, score in zip(best, top)]
@@ -1,22 +1,18 @@
 import pygame
 import sys
 import math
-import threading
-import queue
 import time
 from datetime import datetime
 import random # For varied chatbot responses
 
-# --- Text-to-Speech (TTS) Library ---
-import pyttsx3
-
-# Initialize Pygame
-pygame.init()
+# --- Text-to-Speech (TTS) ---
+# pyttsx3 is imported by init_speech(): it loads the platform's speech driver on import
+from tts_cache import TTSCache
+from tts_pipeline import TTSPipeline, TTSWorker, split_sentences
 
 # --- Screen Dimensions ---
 WIDTH, HEIGHT = 1200, 900
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("SAGI AI Assistant")
+SCREEN = None # Opened by init_display(), importing main.py doesn't open a window
 
 # Colors
 BLACK = (10, 10, 10)
@@ -26,6 +22,8 @@ LIGHT_GREY = (150, 150, 150)
 CYAN = (0, 255, 255)
 GREEN = (0, 200, 0) # For SAGI's responses
 BLUE = (50, 50, 255) # For general information
+DARK_BLUE = (10, 50, 80) # Empty progress bar segments
+RED = (220, 60, 60) # For errors
 
 clock = pygame.time.Clock()
 FPS = 60
@@ -36,139 +34,209 @@ CENTER_Y = HEIGHT // 2
 CENTER_ANIMATION = (CENTER_X_ANIMATION, CENTER_Y)
 
 # --- Speech Recognition Imports and Configuration ---
-import pyaudio
-import numpy as np
-from faster_whisper import WhisperModel
-import webrtcvad
-import collections
+from audio_capture import MicrophoneCapture, WavFileSource
+from utterance_buffer import UtteranceBuffer
+from endpointer import AdaptiveEndpointer
+from segmenter import SpeechSegmenter, SPEECH_START, SPEECH_CANCEL
+from orchestrator import TurnOrchestrator
+from tracing import Tracer
+from streaming_asr import StreamingTranscriber
+from command_spotter import CommandSpotter
+from adaptive_decode import DecodePolicy, DecodeStats
+from model_loader import ModelLoader
+from autotune import load_profile
+from barge_in import EchoGate
+from intents import IntentMatcher, FuzzyIntentClassifier
 
 # --- Configuration for Faster Whisper ---
 MODEL_SIZE = "tiny.en" # 'tiny.en', 'base.en', 'small.en', 'medium.en' etc.
 DEVICE = "cpu"        # 'cpu' or 'cuda' (if you have an NVIDIA GPU)
 COMPUTE_TYPE = "int8" # 'int8' for CPU (faster), 'float16' for GPU (better accuracy, higher VRAM)
-
-print(f"Loading Faster Whisper model: {MODEL_SIZE} on {DEVICE} with {COMPUTE_TYPE} compute type...")
-try:
-    model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
-    print("Model loaded successfully.")
-except Exception as e:
-    print(f"Error loading Whisper model: {e}")
-    print("Ensure you have `ffmpeg` installed and your `DEVICE` and `COMPUTE_TYPE` are compatible.")
-    sys.exit(1) # Exit if model loading fails
+CPU_THREADS = 0       # CTranslate2 threads, 0 = automatic
+NUM_WORKERS = 1       # Concurrent decodes the model can run
+# `python autotune.py <clips>` benchmarks this machine and saves a profile that overrides the values above
+asr_settings = load_profile(dict(model_size=MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE,
+                                 cpu_threads=CPU_THREADS, num_workers=NUM_WORKERS))
+MODEL_WARMUP = True # Decode a short synthetic clip after loading, so the first command isn't slower than the rest
+USE_ASR_SERVICE = True # Share one model per machine through asr_service.py (started on first use)
+USE_ASR_WORKER = True # Without the service, decode in an asr_worker child process so the HUD keeps its frame rate
+
+# Loaded on a background thread (started in main()) so the HUD is up while the model loads
+model_loader = ModelLoader(**asr_settings, warmup=MODEL_WARMUP,
+                           use_service=USE_ASR_SERVICE, worker_process=USE_ASR_WORKER)
 
 # --- PyAudio & VAD Configuration ---
-FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 16000  # VAD operates best at 8kHz, 16kHz, or 32kHz. Whisper also likes 16kHz.
 FRAME_DURATION_MS = 30 # Duration of audio frames for VAD (10, 20, or 30 ms)
 CHUNK_SIZE = int(RATE * FRAME_DURATION_MS / 1000) # Number of samples per frame
-RING_BUFFER_PADDING_MS = 500
-RING_BUFFER_SIZE = int(RING_BUFFER_PADDING_MS / FRAME_DURATION_MS)
+ONSET_WINDOW_FRAMES = 4 # Trigger once ONSET_VOICED_FRAMES of the last 4 frames (120 ms) are voiced
+ONSET_VOICED_FRAMES = 3
+PREROLL_MS = 300 # Audio kept from before the trigger so the first syllable isn't clipped
 
 VAD_AGGRESSIVENESS = 3 # 0 (least aggressive) to 3 (most aggressive)
-
-audio_interface = pyaudio.PyAudio()
+# Adaptive endpointing: trailing silence needed before we stop recording
+ENDPOINT_MIN_HANGOVER_MS = 240 # Short, clean commands
+ENDPOINT_MAX_HANGOVER_MS = 900 # Long or hesitant utterances
+PARTIAL_INTERVAL_MS = 400 # Re-decode the growing utterance this often while the user is talking
+# Adaptive decoding: greedy first, beam search only if a segment crosses one of these
+DECODE_MIN_AVG_LOGPROB = -0.8
+DECODE_MAX_COMPRESSION_RATIO = 2.4
+DECODE_MAX_NO_SPEECH_PROB = 0.6
+BARGE_IN = True # Keep listening while SAGI speaks; talking over a reply stops it and starts a new turn
+TRACE_TURNS = True # Per-turn latency milestones to ~/.sagi/traces/turns.jsonl, `python tracing.py` summarizes them
+
+# One long-lived callback stream, opened by init_audio(); started on the first turn and kept open until exit
+audio_interface = None
+mic = None
+# Reused every turn, voiced frames are converted to float32 straight into it
+utterance = UtteranceBuffer(rate=RATE)
+endpointer = AdaptiveEndpointer(frame_duration_ms=FRAME_DURATION_MS,
+                                min_hangover_ms=ENDPOINT_MIN_HANGOVER_MS,
+                                max_hangover_ms=ENDPOINT_MAX_HANGOVER_MS)
+segmenter = SpeechSegmenter(utterance, endpointer, frame_size=CHUNK_SIZE, frame_duration_ms=FRAME_DURATION_MS,
+                            onset_window_frames=ONSET_WINDOW_FRAMES, onset_voiced_frames=ONSET_VOICED_FRAMES,
+                            preroll_ms=PREROLL_MS)
+decode_policy = DecodePolicy(min_avg_logprob=DECODE_MIN_AVG_LOGPROB, max_compression_ratio=DECODE_MAX_COMPRESSION_RATIO,
+                             max_no_speech_prob=DECODE_MAX_NO_SPEECH_PROB)
+decode_stats = DecodeStats() # Which decode path every turn took and how long it ran
+spotter = CommandSpotter(rate=RATE) # Command keyword fast path, keeps hit rate / latency saved per turn
+# Decodes the utterance while it is still being recorded, so the transcript is (mostly) ready at endpoint
+# (gets the model once model_loader is done)
+streamer = StreamingTranscriber(None, utterance, interval_ms=PARTIAL_INTERVAL_MS, rate=RATE,
+                                policy=decode_policy, stats=decode_stats)
 
 # --- Initialize Text-to-Speech Engine (pyttsx3) ---
-try:
-    engine = pyttsx3.init()
-    # You can change voice, rate, and volume here
-    # Example to list voices and set one (uncomment to use):
-    # voices = engine.getProperty('voices')
-    # for voice in voices:
-    #     print(f"Voice ID: {voice.id}, Name: {voice.name}, Languages: {voice.languages}")
-    # engine.setProperty('voice', voices[0].id) # Try changing index for different voices
-    engine.setProperty('rate', 170) # Speed of speech
-    engine.setProperty('volume', 0.9) # Volume (0.0 to 1.0)
-    print("pyttsx3 engine initialized.")
-except Exception as e:
-    print(f"Error initializing pyttsx3 engine: {e}")
-    print("Ensure you have a TTS engine installed on your system (e.g., eSpeak, Microsoft SAPI5).")
-    engine = None # Set to None if initialization fails
-
-# --- TTS Function with pyttsx3 ---
-def speak_thread_func(text_to_speak, speak_done_event):
-    if engine:
-        engine.say(text_to_speak)
-        engine.runAndWait()
-    speak_done_event.set() # Signal that speaking is done
-
-# --- Speech Recognition Function (No changes here, it's robust) ---
-def takeCommand_natural_convo():
-    print("Listening (speak naturally)...")
-    stream = None
-    ring_buffer = collections.deque(maxlen=RING_BUFFER_SIZE)
-    voiced_frames = []
-    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
-
+TTS_RATE = 170 # Speed of speech
+TTS_VOLUME = 0.9 # Volume (0.0 to 1.0)
+# Set by init_speech(), None until then. The engine itself is tts.engine, created on (and only
+# used by) the TTS worker's thread once it is up: None before that or if no TTS engine is installed.
+tts_cache = None # Fixed replies pre-rendered to WAV (filled in the background from main()), played without synthesis
+tts = None # Replies are spoken sentence by sentence: the next one is synthesized while the current one plays
+tts_worker = None # The only thread that speaks; replies queue up behind each other instead of talking over each other
+echo_gate = None # Tells the user's voice from SAGI's own while a reply plays (see barge_in.py)
+tracer = None
+
+# --- Startup ---
+# Importing main.py only defines things (bench_startup.py keeps it that way); the window,
+# the audio device, the TTS engine and its worker thread and the trace file are set up by
+# these, called from main().
+def init_display():
+    global SCREEN
+    pygame.init()
+    SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("SAGI AI Assistant")
+
+def init_audio():
+    global audio_interface, mic
+    import pyaudio
+    audio_interface = pyaudio.PyAudio()
+    mic = MicrophoneCapture(audio_interface, rate=RATE, frame_size=CHUNK_SIZE)
+
+def make_engine():
+    # Runs on the TTS worker's thread, the only one that drives the engine
     try:
-        stream = audio_interface.open(format=FORMAT,
-                                      channels=CHANNELS,
-                                      rate=RATE,
-                                      input=True,
-                                      frames_per_buffer=CHUNK_SIZE)
-        triggered = False
-        while True:
-            try:
-                audio_chunk = stream.read(CHUNK_SIZE, exception_on_overflow=False)
-            except IOError as e:
-                if e.errno == pyaudio.paInputOverflowed:
-                    continue
-                else:
-                    raise
-
-            if len(audio_chunk) != CHUNK_SIZE * 2:
-                continue
-
-            is_speech = vad.is_speech(audio_chunk, RATE)
-
-            if not triggered:
-                ring_buffer.append((audio_chunk, is_speech))
-                num_voiced = len([f for f, speech in ring_buffer if speech])
-                if num_voiced > 0.9 * ring_buffer.maxlen:
-                    triggered = True
-                    for f, s in ring_buffer:
-                        voiced_frames.append(f)
-                    ring_buffer.clear()
-                    print("Speech detected. Recording...")
-            else:
-                voiced_frames.append(audio_chunk)
-                ring_buffer.append((audio_chunk, is_speech))
-                num_unvoiced = len([f for f, speech in ring_buffer if not speech])
-                if num_unvoiced > 0.8 * ring_buffer.maxlen:
-                    print("Silence detected, stopping recording.")
-                    break
-
-        stream.stop_stream()
-        stream.close()
-
-        if not voiced_frames:
-            print("No speech recorded.")
-            return "None"
-
-        audio_data_bytes = b''.join(voiced_frames)
-        audio_np = np.frombuffer(audio_data_bytes, dtype=np.int16).flatten().astype(np.float32) / 32768.0
+        import pyttsx3
+        engine = pyttsx3.init()
+        # You can change voice, rate, and volume here
+        # Example to list voices and set one (uncomment to use):
+        # voices = engine.getProperty('voices')
+        # for voice in voices:
+        #     print(f"Voice ID: {voice.id}, Name: {voice.name}, Languages: {voice.languages}")
+        # engine.setProperty('voice', voices[0].id) # Try changing index for different voices
+        engine.setProperty('rate', TTS_RATE)
+        engine.setProperty('volume', TTS_VOLUME)
+        print("pyttsx3 engine initialized.")
+    except Exception as e:
+        print(f"Error initializing pyttsx3 engine: {e}")
+        print("Ensure you have a TTS engine installed on your system (e.g., eSpeak, Microsoft SAPI5).")
+        engine = None # Set to None if initialization fails
+    return engine
 
-        print("Transcribing (instant!)...")
-        segments, info = model.transcribe(audio_np, beam_size=5)
+def init_speech():
+    global tts_cache, tts, tts_worker, echo_gate
+    try:
+        tts_cache = TTSCache(rate=TTS_RATE, volume=TTS_VOLUME)
+    except OSError as e:
+        print(f"TTS cache disabled: {e}")
+        tts_cache = None
+    tts = TTSPipeline(None, tts_cache, play_audio_file, cacheable=cacheable_chunks())
+    tts_worker = TTSWorker(tts, make_engine=make_engine) # Doesn't wait for pyttsx3.init(), the HUD is up meanwhile
+    echo_gate = EchoGate(tts_worker.speaking, live=tts.live, rate=RATE, frame_duration_ms=FRAME_DURATION_MS)
+
+def init_tracing():
+    global tracer
+    if TRACE_TURNS:
+        try:
+            tracer = Tracer()
+        except OSError as e:
+            print(f"Turn tracing disabled: {e}")
 
-        recognized_text = ""
-        for segment in segments:
-            recognized_text += segment.text + " "
+def play_audio_file(path, cancel=None, started=None):
+    # Plays a cached reply through pygame's mixer and waits for it (or for `cancel`); False if that isn't possible.
+    # started() is called once the mixer has it, that's the reply's first audio.
+    try:
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        channel = pygame.mixer.Sound(path).play()
+    except (pygame.error, OSError) as e: # OSError: the file was evicted from the cache since lookup()
+        print(f"Could not play cached speech ({e}), synthesizing instead.")
+        return False
+    if started is not None and channel is not None:
+        started()
+    # The echo gate compares what the mic hears against what is being played
+    try:
+        reference = WavFileSource(path, rate=RATE).samples
+    except Exception:
+        reference = None # Nothing to compare against, every frame counts as echo while it plays
+    echo_gate.playback_started(reference)
+    try:
+        while channel is not None and channel.get_busy():
+            if cancel is not None and cancel.is_set():
+                channel.stop()
+                break
+            time.sleep(0.01)
+    finally:
+        echo_gate.playback_stopped()
+    return True
+
+# --- Speech Recognition Stages (run by the orchestrator started in main()) ---
+def on_segment_event(event):
+    if event == SPEECH_START:
+        if BARGE_IN and not tts_worker.finished.is_set():
+            echo_gate.barge_in(tts_worker.cancel) # The user talked over SAGI: stop the reply, this is a new turn
+        streamer.start()
+    elif event == SPEECH_CANCEL:
+        streamer.cancel() # Too short to be speech, the next onset starts a fresh stream (no join on the loop)
+
+def transcribe_utterance():
+    # Runs in the orchestrator's ASR executor once the segmenter has ended an utterance
+    try:
+        # Everything after the last voiced frame is endpoint silence, a partial that saw up to here is final
+        speech_end = len(utterance) - endpointer.silence_frames * CHUNK_SIZE
+        streamer.stop()
+        # Known short commands are answered by the fast path, everything else gets the full transcript
+        recognized_text = spotter.spot(streamer.model, utterance.view()[:speech_end], streamer.covered_segments(speech_end))
+        if recognized_text is None:
+            decode_start = time.time()
+            recognized_text = streamer.finish(speech_end)
+            spotter.record_open(time.time() - decode_start, utterance.view()[:speech_end])
 
         if recognized_text.strip():
             print(f"User said: {recognized_text.strip()}\n")
             return recognized_text.strip().lower()
         else:
             print("Could not understand the audio. Please try again (VAD detected speech, but Whisper got no text).")
-            return "None"
+            return ""
 
     except Exception as e:
         print(f"An error occurred in speech recognition: {e}")
-        if stream and stream.is_active():
-            stream.stop_stream()
-            stream.close()
-        return "None"
+        return ""
+    finally:
+        streamer.stop() # The next turn resets the buffer, no decode may still be reading it
+
+def wait_for_model():
+    streamer.model = model_loader.result() # Raises if loading failed, the HUD shows why
 
 # --- Animation Drawing Functions (No changes, they use CENTER_ANIMATION) ---
 def draw_arc(surface, color, center, radius, start_angle, end_angle, width=3):
@@ -237,104 +305,140 @@ def draw_text(surface, text, pos, font_size=16, color=WHITE, align='left'): # De
         surface.blit(glow, glow_rect)
     surface.blit(rendered, rect)
 
+def draw_segmented_progress_bar(surface, x, y, width, height, segments, filled_segments): # Same bar as initialise.py
+    segment_width = width // segments
+    gap = 4
+    for i in range(segments):
+        rect = pygame.Rect(x + i * segment_width + gap // 2, y, segment_width - gap, height)
+        color = CYAN if i < filled_segments else DARK_BLUE
+        pygame.draw.rect(surface, color, rect)
+        pygame.draw.rect(surface, WHITE, rect, 2)
+
+# --- Fixed response phrases (module level so the TTS cache can pre-render them) ---
+GREETING_RESPONSES = ["Hello there! It's a pleasure to assist you. How can I help today?",
+                      "Hi! I'm SAGI. How can I be of service?",
+                      "Greetings! What's on your mind?"]
+HOW_ARE_YOU_RESPONSES = ["As an AI, I don't experience emotions, but I am fully operational and ready to serve.",
+                         "I am functioning optimally, thank you for asking! How may I assist you?",
+                         "All systems nominal. Ready for your commands!"]
+IDENTITY_RESPONSES = ["My name is SAGI, your AI assistant. I'm here to make your life easier.",
+                      "I am SAGI, designed to assist you with information and tasks.",
+                      "You can call me SAGI. I'm an artificial intelligence at your service."]
+CAPABILITY_RESPONSES = [
+    "I can answer your questions about time and date, offer greetings, and engage in basic conversation. What would you like to explore?",
+    "My current functions include providing time and date information, simple chat, and listening for your commands. How can I be helpful?",
+    "I am programmed to assist with common queries and information retrieval. Feel free to ask me anything within my scope."
+]
+GOODBYE_RESPONSES = ["Goodbye! It was a pleasure interacting with you. Have a great day!",
+                     "Farewell! Feel free to call upon me anytime you need assistance.",
+                     "See you later! I'll be here if you need me."]
+THANKS_RESPONSES = ["You're most welcome! I'm glad I could assist.",
+                    "My pleasure!",
+                    "Anytime!"]
+WEATHER_RESPONSE = "I cannot directly check the weather at the moment, as I'm not connected to external weather services."
+FACT_RESPONSES = [
+    "Did you know that honey never spoils?",
+    "A group of owls is called a parliament.",
+    "The shortest war in history lasted only 38 to 45 minutes, between Britain and Zanzibar in 1896."
+]
+FALLBACK_RESPONSES = [
+    "I'm not quite sure how to respond to that. Could you try rephrasing your question?",
+    "That's an interesting thought, but I don't have information on that yet. Is there anything else I can help with?",
+    "My apologies, I didn't quite catch that, or it's beyond my current capabilities. Can you please repeat?",
+    "I am constantly learning! For now, I can primarily assist with questions about time, date, and general conversation. How about asking me about the time?",
+    "I am an AI designed for specific tasks. While I'd love to help with everything, some topics are still outside my current programming."
+]
+GREETING_OPENING = "Hello!"
+GREETING_TAIL = "I am SAGI, your dedicated AI assistant, ready to assist you 24/7. How may I help you today?"
+# Every reply that doesn't depend on the clock
+FIXED_RESPONSES = (GREETING_RESPONSES + HOW_ARE_YOU_RESPONSES + IDENTITY_RESPONSES + CAPABILITY_RESPONSES
+                   + GOODBYE_RESPONSES + THANKS_RESPONSES + [WEATHER_RESPONSE] + FACT_RESPONSES + FALLBACK_RESPONSES)
+
+def cacheable_chunks():
+    # What the TTS cache keeps: the fixed replies' sentences, everything else is rendered per turn
+    return [chunk for text in FIXED_RESPONSES + [GREETING_OPENING, GREETING_TAIL] for chunk in split_sentences(text)]
+
 # --- Enhanced Chatbot Logic for a more "chatty" experience ---
-def get_sagi_response(query):
-    query = query.lower()
+# All intent phrases compiled into one word-boundary regex; misheard commands ("what's the tie")
+# that match none of them fall back to fuzzy n-gram similarity instead of the "didn't catch that" reply.
+# Built on the first query, the fuzzy classifier's TF-IDF matrix isn't needed before that.
+intent_matcher = None
+
+def get_intent_matcher():
+    global intent_matcher
+    if intent_matcher is None:
+        intent_matcher = IntentMatcher(fuzzy=FuzzyIntentClassifier())
+    return intent_matcher
+
+def get_sagi_response(intent):
+    # The reply for the intent respond() found in the query (None: not understood)
     
     # Greetings
-    if any(phrase in query for phrase in ["hello", "hi", "hey"]):
-        return random.choice(["Hello there! It's a pleasure to assist you. How can I help today?",
-                              "Hi! I'm SAGI. How can I be of service?",
-                              "Greetings! What's on your mind?"])
+    if intent == "greeting":
+        return random.choice(GREETING_RESPONSES)
     
     # How are you?
-    elif any(phrase in query for phrase in ["how are you", "how are you doing", "what's up"]):
-        return random.choice(["As an AI, I don't experience emotions, but I am fully operational and ready to serve.",
-                              "I am functioning optimally, thank you for asking! How may I assist you?",
-                              "All systems nominal. Ready for your commands!"])
+    elif intent == "how_are_you":
+        return random.choice(HOW_ARE_YOU_RESPONSES)
 
     # Time and Date
-    elif "time" in query:
+    elif intent == "time":
         now = datetime.now()
         current_time = now.strftime("%I:%M %p")
         return f"The current time is {current_time}."
-    elif any(phrase in query for phrase in ["date", "today's date"]):
+    elif intent == "date":
         now = datetime.now()
         current_date = now.strftime("%A, %B %d, %Y")
         return f"Today is {current_date}."
 
     # Identity
-    elif any(phrase in query for phrase in ["your name", "who are you"]):
-        return random.choice(["My name is SAGI, your AI assistant. I'm here to make your life easier.",
-                              "I am SAGI, designed to assist you with information and tasks.",
-                              "You can call me SAGI. I'm an artificial intelligence at your service."])
+    elif intent == "identity":
+        return random.choice(IDENTITY_RESPONSES)
     
     # Capabilities
-    elif any(phrase in query for phrase in ["what can you do", "help me", "your capabilities"]):
-        return random.choice([
-            "I can answer your questions about time and date, offer greetings, and engage in basic conversation. What would you like to explore?",
-            "My current functions include providing time and date information, simple chat, and listening for your commands. How can I be helpful?",
-            "I am programmed to assist with common queries and information retrieval. Feel free to ask me anything within my scope."
-        ])
+    elif intent == "capabilities":
+        return random.choice(CAPABILITY_RESPONSES)
 
     # Goodbyes
-    elif any(phrase in query for phrase in ["goodbye", "bye", "exit", "quit", "see you"]):
-        return random.choice(["Goodbye! It was a pleasure interacting with you. Have a great day!",
-                              "Farewell! Feel free to call upon me anytime you need assistance.",
-                              "See you later! I'll be here if you need me."])
+    elif intent == "goodbye":
+        return random.choice(GOODBYE_RESPONSES)
     
     # Affirmatory/Thanks
-    elif any(phrase in query for phrase in ["thank you", "thanks", "ok", "okay"]):
-        return random.choice(["You're most welcome! I'm glad I could assist.",
-                              "My pleasure!",
-                              "Anytime!"])
+    elif intent == "thanks":
+        return random.choice(THANKS_RESPONSES)
 
     # Basic questions / General knowledge (very limited without external data)
-    elif "weather" in query:
-        return "I cannot directly check the weather at the moment, as I'm not connected to external weather services."
-    elif "fact" in query or "tell me something" in query:
-        return random.choice([
-            "Did you know that honey never spoils?",
-            "A group of owls is called a parliament.",
-            "The shortest war in history lasted only 38 to 45 minutes, between Britain and Zanzibar in 1896."
-        ])
+    elif intent == "weather":
+        return WEATHER_RESPONSE
+    elif intent == "fact":
+        return random.choice(FACT_RESPONSES)
     
     # Fallback / Unrecognized
     else:
-        fallback_responses = [
-            "I'm not quite sure how to respond to that. Could you try rephrasing your question?",
-            "That's an interesting thought, but I don't have information on that yet. Is there anything else I can help with?",
-            "My apologies, I didn't quite catch that, or it's beyond my current capabilities. Can you please repeat?",
-            "I am constantly learning! For now, I can primarily assist with questions about time, date, and general conversation. How about asking me about the time?",
-            "I am an AI designed for specific tasks. While I'd love to help with everything, some topics are still outside my current programming."
-        ]
-        return random.choice(fallback_responses) # Randomly select from fallback responses
-
-
-# --- Speech Recognition Thread Function ---
-def speech_recognition_thread(speech_to_gui_queue, gui_to_speech_queue, speaking_status_event):
-    while True:
-        # Wait until SAGI is done speaking before listening again
-        speaking_status_event.wait() # Blocks if SAGI is speaking (event is cleared)
-        speaking_status_event.clear() # Clear it right after SAGI is done, indicating it's listening
-
-        query = takeCommand_natural_convo()
-        if query != "None":
-            speech_to_gui_queue.put(f"User: {query}")
-            
-            response = get_sagi_response(query)
-            speech_to_gui_queue.put(f"SAGI: {response}")
-            gui_to_speech_queue.put(response) # Send response to GUI for speaking
-
-            if any(phrase in query for phrase in ["exit", "quit", "goodbye", "bye", "see you"]):
-                speech_to_gui_queue.put("STOP_GUI") # Signal to stop the GUI
-                break
-        else:
-            # Only update status if nothing was said and SAGI isn't speaking
-            if speaking_status_event.is_set(): # If speaking_done_event is set, means SAGI isn't speaking
-                speech_to_gui_queue.put("User: ...") # Indicate listening or no input
-            
-        time.sleep(0.1)
+        return random.choice(FALLBACK_RESPONSES) # Randomly select from fallback responses
+
+
+def respond(query):
+    # (reply, intent, whether this ends the session)
+    # One pass over the query finds the exact phrases (whole words only), see intents.py; the fuzzy
+    # fallback runs only if there are none
+    matcher = get_intent_matcher()
+    intents = matcher.find_all(query, fuzzy=False)
+    intent = intents[0] if intents else matcher._fuzzy(query)
+    # "goodbye" ends the session even when a higher-priority intent got the reply, but only if it was
+    # actually said: a fuzzy guess ("quiet please", "good boy") must never close SAGI
+    return get_sagi_response(intent), intent, "goodbye" in intents
+
+# --- HUD Bridge ---
+# The orchestrator's thread posts its messages as pygame events; SDL's event queue is
+# thread-safe, and the HUD handles them in the same loop as window events.
+SAGI_MESSAGE = pygame.USEREVENT + 1
+
+def post_to_hud(message):
+    try:
+        pygame.event.post(pygame.event.Event(SAGI_MESSAGE, message=message))
+    except pygame.error:
+        pass # The window is already gone
 
 # --- Main GUI Loop ---
 def main():
@@ -343,20 +447,22 @@ def main():
     rotation = 0
     appear_intervals = [60, 120, 180, 240]
 
-    # Queues for communication
-    speech_to_gui_queue = queue.Queue() # Speech thread sends recognized text/responses to GUI
-    gui_to_speech_queue = queue.Queue() # GUI thread sends text to TTS engine
-
-    # Event to synchronize listening and speaking
-    # Set initially to allow listening right away
-    speaking_done_event = threading.Event()
-    speaking_done_event.set()
-
-    # Start the speech recognition thread
-    speech_thread = threading.Thread(target=speech_recognition_thread,
-                                     args=(speech_to_gui_queue, gui_to_speech_queue, speaking_done_event),
-                                     daemon=True)
-    speech_thread.start()
+    init_display()
+    init_audio()
+    init_speech()
+    init_tracing()
+    # Load the Whisper model in the background, the HUD renders (and shows progress) meanwhile
+    model_loader.start()
+    # Render any fixed sentence that isn't in the TTS cache yet (in a separate process), once the
+    # worker has shown there is a TTS engine to render with
+    prerender_pending = tts_cache is not None
+
+    # Start the conversation loop (capture -> segment -> transcribe -> respond -> speak), it waits for the model itself
+    streamer.on_partial = lambda text: post_to_hud(f"PARTIAL: {text}") # Partials only update the status line
+    orchestrator = TurnOrchestrator(mic, segmenter, transcribe_utterance, respond, tts_worker, post_to_hud,
+                                    ready=wait_for_model, on_event=on_segment_event,
+                                    gate=echo_gate.filter if BARGE_IN else None, barge_in=BARGE_IN, tracer=tracer,
+                                    aggressiveness=VAD_AGGRESSIVENESS, rate=RATE).start()
 
     text_display_history = []
     MAX_HISTORY_LINES = 20 # More lines for even smaller text
@@ -371,31 +477,31 @@ def main():
     # We can hardcode IST for the greeting, but a real solution needs timezone library.
     current_time_with_tz = f"{current_time_str} IST" 
 
-    greeting_text = (
-        f"Hello! The current date is {current_date_str} and the time is {current_time_with_tz}. "
-        "I am SAGI, your dedicated AI assistant, ready to assist you 24/7. "
-        "How may I help you today?"
-    )
+    greeting_text = f"{GREETING_OPENING} The current date is {current_date_str} and the time is {current_time_with_tz}. " + GREETING_TAIL
     text_display_history.append("SAGI: " + greeting_text)
-    # Speak the greeting
-    if engine: # Only speak if engine initialized
-        speaking_done_event.clear() # Clear the event immediately before speaking
-        greeting_speak_thread = threading.Thread(target=speak_thread_func, args=(greeting_text, speaking_done_event))
-        greeting_speak_thread.start()
+    # Speak the greeting (queued, the worker speaks it once its engine is up; without one only cached sentences play)
+    tts_worker.say(greeting_text)
 
     while running:
         clock.tick(FPS)
+        if prerender_pending and tts_worker.ready.is_set():
+            prerender_pending = False
+            if tts.engine:
+                tts_cache.prerender(cacheable_chunks())
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+                tts_worker.cancel() # Closing the window silences SAGI right away
 
-        # --- Process messages from speech recognition thread ---
-        try:
-            while True:
-                message = speech_to_gui_queue.get_nowait()
+            # --- Messages from the conversation loop ---
+            elif event.type == SAGI_MESSAGE:
+                message = event.message
                 if message == "STOP_GUI":
                     running = False
-                    break
+                    continue
+                if message.startswith("PARTIAL:"):
+                    current_status = f"Hearing: {message[9:]}"
+                    continue
                 text_display_history.append(message)
                 if len(text_display_history) > MAX_HISTORY_LINES:
                     text_display_history.pop(0) # Remove oldest line
@@ -408,19 +514,6 @@ def main():
                     current_status = "Listening..."
                 else:
                     current_status = message
-        except queue.Empty:
-            pass
-
-        # --- Process responses from GUI for speaking ---
-        try:
-            while True:
-                response_to_speak = gui_to_speech_queue.get_nowait()
-                if engine: # Only speak if engine initialized
-                    speak_thread = threading.Thread(target=speak_thread_func, args=(response_to_speak, speaking_done_event))
-                    speaking_done_event.clear() # Clear the event before starting speech
-                    speak_thread.start()
-        except queue.Empty:
-            pass
 
         SCREEN.fill(BLACK)
 
@@ -472,6 +565,15 @@ def main():
             else:
                 draw_text(SCREEN, text_line, (50, text_start_y + i * line_height), font_size=14, color=LIGHT_GREY, align='left')
 
+        if model_loader.failed():
+            draw_text(SCREEN, model_loader.describe(), (50, HEIGHT - 80), font_size=14, color=RED, align='left')
+        elif not model_loader.ready():
+            # Model still loading: real stage progress instead of a frozen window
+            draw_text(SCREEN, model_loader.describe(), (50, HEIGHT - 110), font_size=14, color=LIGHT_GREY, align='left')
+            draw_segmented_progress_bar(SCREEN, 50, HEIGHT - 95, 400, 20, 20, int(model_loader.progress * 20))
+            current_status = "Initializing..."
+        elif current_status == "Initializing...":
+            current_status = "Listening..."
         draw_text(SCREEN, f"Current Status: {current_status}", (50, HEIGHT - 50), font_size=16, color=CYAN, align='left') # Adjusted font size for status
 
         if frame_count > max(appear_intervals):
@@ -480,11 +582,21 @@ def main():
         frame_count += 1
         pygame.display.flip()
 
+    orchestrator.stop()
+    tts_worker.finished.wait(timeout=10) # Let the goodbye finish, the mixer goes with pygame.quit()
+    tts_worker.stop()
     pygame.quit()
+    print(decode_stats.summary())
+    print(spotter.report())
+    print(tts.report())
+    print(echo_gate.report())
+    if tts_cache:
+        print(tts_cache.report())
+    if model_loader.ready() and hasattr(model_loader.result(), "close"):
+        model_loader.result().close() # Service connection / worker process
+    mic.close()
     if audio_interface:
         audio_interface.terminate()
-    if engine: # Cleanly stop the pyttsx3 engine
-        engine.stop()
     sys.exit()
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from streaming_asr import transcribe_text
+
+# --- Background Whisper Model Loading ---
+# Importing faster_whisper (ctranslate2) and building the WhisperModel takes seconds, longer
+# on first run when the weights are downloaded. The loader does it on a worker thread, so the
+# HUD can draw from its first frame; `future` resolves to the model (or the load error).
+
+WARMUP_SECONDS = 2.0
+WARMUP_BEAM_SIZES = (1, 5) # Streaming partials are greedy, final decodes use beam search
+RATE = 16000
+
+
+def warmup_audio(seconds=WARMUP_SECONDS, rate=RATE):
+    # Voice-like harmonic stack with a syllable-rate envelope, so the decoder actually runs
+    # (pure silence can make Whisper skip most of the work)
+    t = np.arange(int(seconds * rate), dtype=np.float32) / rate
+    voice = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 12))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)
+    return (0.1 * voice * envelope).astype(np.float32)
+
+
+def warm_up(model, beam_sizes=WARMUP_BEAM_SIZES, seconds=WARMUP_SECONDS):
+    """
+    Decodes a short synthetic clip once per beam size, so CTranslate2's lazy allocations
+    and cold caches are paid for here instead of on the user's first command.
+    Returns the warm-up time in seconds.
+    """
+    audio_np = warmup_audio(seconds)
+    start = time.time()
+    for beam_size in beam_sizes:
+        beam_start = time.time()
+        transcribe_text(model, audio_np, beam_size) # Same options as the real turns; consumes the segment generator, i.e. really decodes
+        print(f"Warm-up decode (beam_size={beam_size}) took {time.time() - beam_start:.3f} seconds")
+    elapsed = time.time() - start
+    print(f"Model warm-up done in {elapsed:.3f} seconds.")
+    return elapsed
+
+LOAD_STAGES = (
+    ("connecting", 0.05),  # Only with use_service: looking for / starting the shared ASR daemon
+    ("starting worker", 0.1), # Only with worker_process
+    ("importing", 0.15),   # (state, progress once this stage has been reached)
+    ("downloading", 0.35), # Resolves the model in the local cache, only slow on first run
+    ("loading", 0.6),
+    ("warming up", 0.85),  # Only with warmup enabled
+    ("ready", 1.0),
+)
+
+
+class ModelLoader:
+    def __init__(self, model_size, device="cpu", compute_type="int8", cpu_threads=0, num_workers=1, warmup=True,
+                 warmup_beam_sizes=WARMUP_BEAM_SIZES, use_service=False, worker_process=False, on_stage=None):
+        self.model_size = model_size
+        self.cpu_threads = cpu_threads # 0 lets CTranslate2 pick
+        self.num_workers = num_workers
+        self.use_service = use_service # Use the shared asr_service daemon's model, loading one here only as fallback
+        self.worker_process = worker_process # Otherwise load it in an asr_worker child process instead of this one
+        self.on_stage = on_stage
+        self.device = device
+        self.compute_type = compute_type
+        self.warmup = warmup
+        self.warmup_beam_sizes = warmup_beam_sizes
+        self.warmup_time = None
+        self.future = Future()
+        self.state = "waiting"
+        self.progress = 0.0
+        self.error = None
+        self.load_time = None
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+
+    def _stage(self, state):
+        self.state = state
+        self.progress = dict(LOAD_STAGES)[state]
+        print(f"Whisper model: {state}...")
+        if self.on_stage:
+            self.on_stage(state, self.progress)
+
+    def _run(self):
+        start = time.time()
+        self.future.set_running_or_notify_cancel()
+        model = self._connect_service() if self.use_service else None
+        if model is not None:
+            self.load_time = time.time() - start
+            self._stage("ready")
+            print(f"Using the shared ASR service ({self.load_time:.2f} seconds to connect).")
+            self.future.set_result(model)
+            return
+        try:
+            if self.worker_process:
+                model = self._start_worker()
+                self.load_time = time.time() - start
+                self._stage("ready")
+                print(f"ASR worker process ready in {self.load_time:.2f} seconds.")
+                self.future.set_result(model)
+                return
+            self._stage("importing")
+            from faster_whisper import WhisperModel
+            from faster_whisper.utils import download_model
+
+            model_path = self.model_size
+            if not os.path.isdir(model_path):
+                self._stage("downloading")
+                model_path = download_model(self.model_size)
+
+            self._stage("loading")
+            model = WhisperModel(model_path, device=self.device, compute_type=self.compute_type,
+                                 cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+
+            if self.warmup:
+                self._stage("warming up")
+                self.warmup_time = warm_up(model, self.warmup_beam_sizes)
+        except Exception as e:
+            self.state = "failed"
+            self.error = e
+            print(f"Error loading Whisper model: {e}")
+            print("Ensure you have `ffmpeg` installed and your `DEVICE` and `COMPUTE_TYPE` are compatible.")
+            self.future.set_exception(e)
+            return
+        self.load_time = time.time() - start
+        self._stage("ready")
+        print(f"Model loaded successfully in {self.load_time:.2f} seconds.")
+        self.future.set_result(model)
+
+    def _connect_service(self):
+        import asr_service # Not at the top: asr_service itself loads its model with a ModelLoader
+        if not asr_service.available():
+            return None
+        self._stage("connecting")
+
+        def on_status(status):
+            # Mirror the daemon's own load progress (it may have just been started for us)
+            self.state = f"service {status['state']}"
+            self.progress = status["progress"]
+
+        try:
+            return asr_service.connect(on_status=on_status)
+        except Exception as e:
+            print(f"ASR service unavailable ({e}), loading the model in this process instead.")
+            return None
+
+    def _start_worker(self):
+        from asr_worker import ASRWorkerProcess # Not at the top: the worker loads its model with a ModelLoader
+        self._stage("starting worker")
+
+        def on_stage(state, progress):
+            # The worker's own load stages, shown as they happen
+            self.state = state
+            self.progress = progress
+
+        settings = dict(model_size=self.model_size, device=self.device, compute_type=self.compute_type,
+                        cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+        return ASRWorkerProcess(settings, warmup=self.warmup, rate=RATE).start(on_stage)
+
+    def ready(self):
+        return self.future.done() and self.error is None
+
+    def failed(self):
+        return self.error is not None
+
+    def result(self, timeout=None):
+        # Blocks until the model is loaded; raises the load error if it failed
+        return self.future.result(timeout)
+
+    def describe(self):
+        # Status line for the HUD
+        if self.error is not None:
+            return f"Speech model failed to load: {self.error}"
+        if self.state == "ready":
+            warmed = f", warm-up {self.warmup_time:.1f} s" if self.warmup_time is not None else ""
+            return f"Speech model ready ({self.model_size}, {self.load_time:.1f} s{warmed})"
+        return f"Loading speech model ({self.model_size}): {self.state}... {int(self.progress * 100)}%"
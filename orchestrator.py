@@ -0,0 +1,172 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import webrtcvad
+from segmenter import feed_frame, SPEECH_START, SPEECH_END, VAD_AGGRESSIVENESS, RATE
+from tracing import ONSET, ENDPOINT, TRANSCRIBE_START, TRANSCRIBE_END, INTENT
+
+# --- Turn Orchestrator ---
+# One conversation turn as explicit stages on an asyncio loop (in its own thread, pygame
+# keeps the main one): capture -> segment -> transcribe -> respond -> speak. The mic's
+# FrameRing stays the only audio buffer: its callback just wakes the loop, which reads the
+# frames straight out of the ring and segments them one by one (a busy loop falls behind in
+# the bounded ring, which drops the oldest frames, not in a growing queue). Sources that
+# can't wake the loop (files, stdin) are read in a one-thread executor instead. The
+# blocking stages (the Whisper decode, waiting for TTS) run in executors and are awaited,
+# so each stage starts the moment the previous one is done instead of on a polling tick.
+# Everything the HUD shows goes through notify(message), which must be thread-safe
+# (main.py posts pygame events).
+
+
+class TurnOrchestrator:
+    """
+    `source` is an audio_capture source, `segmenter` a SpeechSegmenter. The stages the
+    caller supplies:
+      ready()             - blocks until the model is loaded (raises if it failed)
+      transcribe()        - blocking, text of the utterance in segmenter.utterance ("" if none)
+      respond(text)       - (reply, intent, last_turn)
+      notify(message)     - HUD message ("User: ...", "SAGI: ...", "PARTIAL: ...", "STOP_GUI")
+    Replies are queued on `tts_worker` (tts_pipeline.TTSWorker). With barge_in=False the
+    next turn waits until SAGI is done speaking and drops what the mic heard meanwhile.
+    With a `tracer` (tracing.Tracer) every turn's milestones are written to the trace file.
+    """
+
+    def __init__(self, source, segmenter, transcribe, respond, tts_worker, notify, ready=None,
+                 on_event=None, gate=None, barge_in=True, tracer=None, aggressiveness=VAD_AGGRESSIVENESS, rate=RATE):
+        self.source = source
+        self.segmenter = segmenter
+        self.transcribe = transcribe
+        self.respond = respond
+        self.tts_worker = tts_worker
+        self.notify = notify
+        self.ready = ready
+        self.on_event = on_event
+        self.gate = gate
+        self.barge_in = barge_in
+        self.tracer = tracer
+        self.trace = None # TurnTrace of the turn being listened to
+        self.rate = rate
+        self.aggressiveness = aggressiveness
+        self.asr_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr") # One decode at a time
+        self.reader = None # Executor for sources that can't wake the loop
+        self.running = False
+        self.loop = None
+        self.wakeup = None # asyncio.Event set when the mic has new frames
+        self.task = None
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        # After the goodbye or a failed model load asyncio.run() has already returned and closed the loop
+        if self.thread.is_alive() and self.loop is not None and self.task is not None and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.task.cancel)
+            except RuntimeError:
+                pass # The loop closed in between
+        self.thread.join(timeout=2)
+        self.asr_executor.shutdown(wait=False)
+        if self.reader is not None:
+            self.reader.shutdown(wait=False)
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        try:
+            await self.run()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.running = False
+            self.source.set_listener(None)
+
+    async def run(self):
+        if self.ready is not None:
+            try:
+                await self.loop.run_in_executor(self.asr_executor, self.ready)
+            except Exception:
+                return # The HUD shows why the model isn't there
+        self.wakeup = asyncio.Event()
+        if not self.source.set_listener(self._frames_arrived):
+            self.reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-read")
+        self.source.start()
+        while self.running:
+            if not self.barge_in:
+                await self.loop.run_in_executor(None, self.tts_worker.finished.wait)
+                self.source.discard_pending() # SAGI's own voice
+            trace = self.trace = self.tracer.begin_turn() if self.tracer else None
+            if not await self.segment():
+                if trace is not None:
+                    trace.close(no_speech=True)
+                if self.source.finished:
+                    break
+                continue
+            text = await self.transcribe_stage(trace)
+            if not text:
+                if trace is not None:
+                    trace.close(no_text=True)
+                if self.tts_worker.finished.is_set(): # Don't cover up a reply that is being spoken
+                    self.notify("User: ...")
+                continue
+            self.notify(f"User: {text}")
+            reply, intent, last_turn = self.respond(text)
+            if trace is not None:
+                trace.mark(INTENT, intent=intent)
+            self.notify(f"SAGI: {reply}")
+            self.tts_worker.say(reply, trace=trace) # Closed by the TTS worker once spoken
+            if last_turn:
+                self.notify("STOP_GUI")
+                break
+
+    def _frames_arrived(self):
+        # Runs in the audio callback after every write to the ring, only wakes the loop
+        if not self.wakeup.is_set():
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def _next_frame(self):
+        # Next frame (a view into the source's buffer, used before the next read), None at the end of the input
+        while True:
+            if self.reader is not None:
+                frame = await self.loop.run_in_executor(self.reader, self.source.read_frame, 0.5)
+            else:
+                self.wakeup.clear()
+                frame = self.source.read_frame(timeout=0)
+            if frame is not None or self.source.finished:
+                return frame
+            if self.reader is None:
+                await self.wakeup.wait()
+
+    async def segment(self):
+        """Segment stage: True once an utterance is in segmenter.utterance."""
+        self.segmenter.reset()
+        vad = webrtcvad.Vad(self.aggressiveness) # Fresh every utterance, like record_utterance and batch_vad
+        print("Listening (speak naturally)...")
+        while True:
+            frame = await self._next_frame()
+            if frame is None:
+                return self.segmenter.finish()
+            event = feed_frame(vad, self.segmenter, frame, self.rate, self.on_event, self.gate)
+            if event == SPEECH_START and self.trace is not None:
+                self.trace.mark(ONSET)
+            elif event == SPEECH_END:
+                if self.trace is not None:
+                    self.trace.mark(ENDPOINT)
+                return True
+
+    async def transcribe_stage(self, trace):
+        audio_seconds = self.segmenter.utterance.duration(self.rate)
+        start = time.monotonic()
+        if trace is not None:
+            trace.mark(TRANSCRIBE_START, audio_s=round(audio_seconds, 2))
+        text = await self.loop.run_in_executor(self.asr_executor, self.transcribe)
+        if trace is not None:
+            decode_seconds = time.monotonic() - start
+            trace.mark(TRANSCRIBE_END, rtf=round(decode_seconds / audio_seconds, 4) if audio_seconds else None)
+        return text
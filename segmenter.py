@@ -0,0 +1,164 @@
+import numpy as np
+import webrtcvad
+
+# --- Segmenter Configuration ---
+RATE = 16000
+FRAME_DURATION_MS = 30
+CHUNK_SIZE = int(RATE * FRAME_DURATION_MS / 1000)
+VAD_AGGRESSIVENESS = 3
+ONSET_WINDOW_FRAMES = 4  # Look at the last 120 ms to decide speech has started...
+ONSET_VOICED_FRAMES = 3  # ...and trigger once 3 of them are voiced (~90-120 ms after onset)
+PREROLL_MS = 300         # Audio kept from before the onset window so the first syllable isn't clipped
+MIN_SPEECH_MS = 150      # Triggers with less voiced audio than this were a click/cough, keep listening
+
+SPEECH_START = "start"
+SPEECH_END = "end"
+SPEECH_CANCEL = "cancel" # A trigger turned out too short to be speech, back to waiting
+
+
+class SpeechSegmenter:
+    """
+    Onset/endpoint state machine shared by main.py, speechreg.py and batch_vad.py.
+    Feed it one frame + VAD decision at a time with process(); all bookkeeping is
+    O(1) per frame (running counters, preallocated pre-roll ring). Audio of the
+    current utterance ends up in `utterance` (an UtteranceBuffer); the end of an
+    utterance is decided by `endpointer` (an AdaptiveEndpointer).
+    """
+
+    def __init__(self, utterance, endpointer, frame_size=CHUNK_SIZE, frame_duration_ms=FRAME_DURATION_MS,
+                 onset_window_frames=ONSET_WINDOW_FRAMES, onset_voiced_frames=ONSET_VOICED_FRAMES,
+                 preroll_ms=PREROLL_MS, min_speech_ms=MIN_SPEECH_MS):
+        self.utterance = utterance
+        self.endpointer = endpointer
+        self.frame_size = frame_size
+        self.frame_duration_ms = frame_duration_ms
+        self.onset_window_frames = onset_window_frames
+        self.onset_voiced_frames = onset_voiced_frames
+        self.min_speech_ms = min_speech_ms
+        # Pre-roll ring holds the onset window plus PREROLL_MS before it
+        self.preroll_frames = onset_window_frames + int(preroll_ms / frame_duration_ms)
+        self.preroll = np.zeros((self.preroll_frames, frame_size), dtype=np.int16)
+        self.onset_flags = [False] * onset_window_frames
+        self.reset()
+
+    def reset(self):
+        # Start of a new turn: forget everything, including the pre-roll
+        self.triggered = False
+        self.frame_index = 0   # Frames seen since reset()
+        self.start_index = None # frame_index of the first frame in the current utterance
+        self.onset_count = 0   # Voiced frames in the onset window
+        for k in range(self.onset_window_frames):
+            self.onset_flags[k] = False
+        self.utterance.reset()
+        self.endpointer.reset()
+
+    def process(self, frame, is_speech):
+        """
+        Feeds one frame (int16, or None when only the timeline matters) and its
+        VAD decision. Returns SPEECH_START, SPEECH_END, SPEECH_CANCEL or None.
+        """
+        index = self.frame_index
+        self.frame_index += 1
+        if frame is not None:
+            # Always kept up to date, a too-short trigger can drop back to waiting for onset
+            self.preroll[index % self.preroll_frames] = frame
+
+        if self.triggered:
+            if frame is not None:
+                self.utterance.append(frame)
+            if not self.endpointer.update(is_speech):
+                return None
+            if self.endpointer.voiced_frames * self.frame_duration_ms < self.min_speech_ms:
+                self._rearm()
+                return SPEECH_CANCEL
+            return SPEECH_END
+
+        # Untriggered: O(1) update of the voiced count in the onset window
+        slot = index % self.onset_window_frames
+        self.onset_count += is_speech - self.onset_flags[slot]
+        self.onset_flags[slot] = is_speech
+        if self.onset_count < self.onset_voiced_frames:
+            return None
+
+        self.triggered = True
+        available = min(self.frame_index, self.preroll_frames)
+        self.start_index = self.frame_index - available
+        if frame is not None:
+            for k in range(self.start_index, self.frame_index):
+                self.utterance.append(self.preroll[k % self.preroll_frames])
+        # The endpointer starts counting from the first voiced frame of the onset window
+        started = False
+        for k in range(index - self.onset_window_frames + 1, index + 1):
+            if k < 0:
+                continue
+            flag = self.onset_flags[k % self.onset_window_frames]
+            started = started or flag
+            if started:
+                self.endpointer.update(flag)
+        return SPEECH_START
+
+    def skip_silence(self, num_frames):
+        # Timeline-only shortcut for batch_vad: same as num_frames process(None, False) calls
+        # while untriggered (nothing can trigger during a run of non-speech)
+        for _ in range(min(num_frames, self.onset_window_frames)):
+            self.process(None, False)
+        self.frame_index += max(num_frames - self.onset_window_frames, 0)
+
+    def finish(self):
+        """End of input: True if there is a usable utterance in progress."""
+        return self.triggered and self.endpointer.voiced_frames * self.frame_duration_ms >= self.min_speech_ms
+
+    def _rearm(self):
+        # The "utterance" was too short to be speech: drop it and go back to waiting for onset
+        self.triggered = False
+        self.start_index = None
+        self.onset_count = 0
+        for k in range(self.onset_window_frames):
+            self.onset_flags[k] = False
+        self.utterance.reset()
+        self.endpointer.reset()
+
+
+def feed_frame(vad, segmenter, frame, rate=RATE, on_event=None, gate=None):
+    """
+    One frame through the VAD (and `gate`) into the segmenter. Returns the segmenter event,
+    or None. Shared by record_utterance and orchestrator.TurnOrchestrator.
+    """
+    # VAD expects 16-bit PCM bytes, a uint8 view avoids copying the frame
+    is_speech = vad.is_speech(frame.view(np.uint8), rate)
+    if gate is not None:
+        is_speech = gate(frame, is_speech)
+    event = segmenter.process(frame, is_speech)
+    if event is None:
+        return None
+    if on_event:
+        on_event(event)
+    if event == SPEECH_START:
+        print("Speech detected. Recording...")
+    elif event == SPEECH_END:
+        print("Silence detected, stopping recording.")
+        print(segmenter.endpointer.report())
+    return event
+
+
+def record_utterance(source, segmenter, aggressiveness=VAD_AGGRESSIVENESS, rate=RATE, on_event=None, gate=None):
+    """
+    Reads frames from an audio_capture source until one utterance has been
+    segmented. Returns True if segmenter.utterance holds speech to transcribe.
+    on_event, if given, is called with every segmenter event (e.g. to start
+    streaming transcription on SPEECH_START). gate(frame, is_speech), if given, gets
+    the final say on every VAD decision (barge_in.EchoGate drops SAGI's own voice).
+    """
+    segmenter.reset()
+    vad = webrtcvad.Vad(aggressiveness)
+    source.start() # No-op after the first turn, the mic stream stays open between turns
+    while True:
+        frame = source.read_frame(timeout=1.0)
+        if frame is None:
+            if source.finished:
+                # End of a file/stdin source: whatever was recorded so far is the last utterance
+                return segmenter.finish()
+            continue # Nothing captured yet, keep waiting
+
+        if feed_frame(vad, segmenter, frame, rate, on_event, gate) == SPEECH_END:
+            return True
@@ -1,158 +1,280 @@
+import os
 import time
-import pyaudio
+import argparse
 import numpy as np
-from faster_whisper import WhisperModel
-import webrtcvad
-import collections
+from audio_capture import open_source
+from utterance_buffer import UtteranceBuffer
+from endpointer import AdaptiveEndpointer
+from segmenter import SpeechSegmenter, record_utterance, SPEECH_START, SPEECH_CANCEL
+from streaming_asr import StreamingTranscriber, transcribe_text
+from command_spotter import CommandSpotter
+from adaptive_decode import DecodePolicy, DecodeStats, timed_decode, FALLBACK_BEAM_SIZE
+from model_loader import ModelLoader
+from autotune import load_profile
+from tracing import Tracer, ONSET, ENDPOINT, TRANSCRIBE_START, TRANSCRIBE_END
+import batch_vad
 import sys
 
 # --- Configuration for Faster Whisper ---
 MODEL_SIZE = "tiny.en" # 'tiny.en', 'base.en', 'small.en', 'medium.en' etc.
 DEVICE = "cpu"        # 'cpu' or 'cuda' (if you have an NVIDIA GPU)
 COMPUTE_TYPE = "int8" # 'int8' for CPU (faster), 'float16' for GPU (better accuracy, higher VRAM)
+CPU_THREADS = 0       # CTranslate2 threads, 0 = automatic
+NUM_WORKERS = 1       # Concurrent decodes the model can run
+# `python autotune.py <clips>` benchmarks this machine and saves a profile that overrides the values above
+asr_settings = load_profile(dict(model_size=MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE,
+                                 cpu_threads=CPU_THREADS, num_workers=NUM_WORKERS))
+MODEL_WARMUP = True # Decode a short synthetic clip at every beam size we use, so turn one runs at full speed
+USE_ASR_SERVICE = True # Share one model per machine through asr_service.py (started on first use)
+TRACE_TURNS = True # Live turns' milestones go to the same trace file as main.py's (source "speechreg")
 
-# Load the Faster Whisper model once at the start
-print(f"Loading Faster Whisper model: {MODEL_SIZE} on {DEVICE} with {COMPUTE_TYPE} compute type...")
-try:
-    model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
-    print("Model loaded successfully.")
-except Exception as e:
-    print(f"Error loading Whisper model: {e}")
-    print("Ensure you have `ffmpeg` installed and your `DEVICE` and `COMPUTE_TYPE` are compatible.")
-    sys.exit(1) # Exit if model loading fails
-
-# --- PyAudio & VAD Configuration ---
-FORMAT = pyaudio.paInt16
+# Loaded once by load_model() (from __main__, after the arguments are parsed): a client of the
+# shared ASR service, or a local WhisperModel as fallback
+model = None
+
+# --- Audio & VAD Configuration ---
 CHANNELS = 1
 RATE = 16000  # VAD operates best at 8kHz, 16kHz, or 32kHz. Whisper also likes 16kHz.
 FRAME_DURATION_MS = 30 # Duration of audio frames for VAD (10, 20, or 30 ms)
 CHUNK_SIZE = int(RATE * FRAME_DURATION_MS / 1000) # Number of samples per frame
-# Number of frames to keep in a buffer to check for speech end
-# This means we'll keep 0.5 seconds of audio buffer to detect trailing silence
-RING_BUFFER_PADDING_MS = 500
-RING_BUFFER_SIZE = int(RING_BUFFER_PADDING_MS / FRAME_DURATION_MS)
+# Speech onset: trigger once ONSET_VOICED_FRAMES of the last ONSET_WINDOW_FRAMES frames are voiced,
+# i.e. about 100 ms after the user starts talking instead of ~450 ms.
+ONSET_WINDOW_FRAMES = 4
+ONSET_VOICED_FRAMES = 3
+# Audio kept from before the trigger and prepended to the utterance, so the first syllable isn't clipped
+PREROLL_MS = 300
 
 VAD_AGGRESSIVENESS = 3 # 0 (least aggressive) to 3 (most aggressive)
 # Mode 0: Aggressive on speech, very tolerant of noise
 # Mode 3: Most aggressive on non-speech. Useful for noisy environments to cut out noise.
 # If you miss soft speech, try 0 or 1.
 
-audio_interface = pyaudio.PyAudio()
+# Adaptive endpointing: instead of waiting for 80% of the ring buffer to be silent,
+# the trailing silence we wait for shrinks for short clean commands and grows for long, hesitant ones.
+ENDPOINT_MIN_HANGOVER_MS = 240
+ENDPOINT_MAX_HANGOVER_MS = 900
+
+# Streaming transcription: while the user is talking, the growing utterance is re-decoded this often
+# (greedy) and the words two decodes in a row agree on are committed. If the last partial decode
+# already covered all the speech when the endpoint fires, it is used as the final transcript.
+PARTIAL_INTERVAL_MS = 400
+
+# Adaptive decoding: every utterance is decoded greedily first and only re-decoded with beam search
+# when a segment's avg_logprob, compression_ratio or no_speech_prob crosses these thresholds
+DECODE_MIN_AVG_LOGPROB = -0.8
+DECODE_MAX_COMPRESSION_RATIO = 2.4
+DECODE_MAX_NO_SPEECH_PROB = 0.6
+
+# One long-lived microphone stream, only created when a turn actually reads from the mic
+# so file/stdin replay works on machines without an audio device (or pyaudio).
+mic = None
+
+def get_microphone():
+    global mic
+    if mic is None:
+        mic = open_source("mic", rate=RATE, frame_size=CHUNK_SIZE)
+    return mic
+
+# Reused every turn, voiced frames are converted to float32 straight into it
+utterance = UtteranceBuffer(rate=RATE)
+endpointer = AdaptiveEndpointer(frame_duration_ms=FRAME_DURATION_MS,
+                                min_hangover_ms=ENDPOINT_MIN_HANGOVER_MS,
+                                max_hangover_ms=ENDPOINT_MAX_HANGOVER_MS)
+# Onset/endpoint state machine (shared with main.py and batch_vad.py), fills `utterance`
+segmenter = SpeechSegmenter(utterance, endpointer, frame_size=CHUNK_SIZE, frame_duration_ms=FRAME_DURATION_MS,
+                            onset_window_frames=ONSET_WINDOW_FRAMES, onset_voiced_frames=ONSET_VOICED_FRAMES,
+                            preroll_ms=PREROLL_MS)
+decode_policy = DecodePolicy(min_avg_logprob=DECODE_MIN_AVG_LOGPROB, max_compression_ratio=DECODE_MAX_COMPRESSION_RATIO,
+                             max_no_speech_prob=DECODE_MAX_NO_SPEECH_PROB)
+decode_stats = DecodeStats() # Which decode path every turn took and how long it ran
+spotter = CommandSpotter(rate=RATE) # Command keyword fast path, keeps hit rate / latency saved per turn
+# Reads `utterance` from a worker thread while record_utterance is still filling it
+streamer = StreamingTranscriber(None, utterance, interval_ms=PARTIAL_INTERVAL_MS, rate=RATE,
+                                policy=decode_policy, stats=decode_stats)
+# Set by --baseline: also time a fixed beam_size=5 decode of every turn, to measure what adaptive decoding saves
+measure_baseline = False
+baseline_seconds = 0.0
+
+def time_baseline(audio_np):
+    global baseline_seconds
+    if measure_baseline:
+        start = time.time()
+        transcribe_text(model, audio_np, FALLBACK_BEAM_SIZE)
+        baseline_seconds += time.time() - start
 
-def takeCommand_natural_convo():
+def load_model():
+    global model
+    print(f"Loading Faster Whisper model: {asr_settings['model_size']} on {asr_settings['device']} "
+          f"with {asr_settings['compute_type']} compute type...")
+    try:
+        model = ModelLoader(**asr_settings, warmup=MODEL_WARMUP,
+                            use_service=USE_ASR_SERVICE).start().result()
+    except Exception:
+        sys.exit(1) # Exit if model loading fails, ModelLoader already printed why
+    streamer.model = model
+
+tracer = None # Opened by init_tracing()
+
+def init_tracing():
+    global tracer
+    if TRACE_TURNS:
+        try:
+            tracer = Tracer(source="speechreg")
+        except OSError as e:
+            print(f"Turn tracing disabled: {e}")
+
+def print_partial(text):
+    print(f"  ... {text}")
+
+def takeCommand_natural_convo(source=None, on_partial=print_partial):
+    # `source` is any audio_capture source (mic, WAV/raw file, stdin, array); defaults to the microphone
+    if source is None:
+        source = get_microphone()
     print("Listening (speak naturally)...")
-    stream = None
-    
-    # We'll use a `collections.deque` (double-ended queue) as a ring buffer
-    # to store recent audio frames and detect speech boundaries.
-    ring_buffer = collections.deque(maxlen=RING_BUFFER_SIZE)
-    voiced_frames = [] # Store actual speech frames
+    streamer.on_partial = on_partial
+    trace = tracer.begin_turn() if tracer else None
 
-    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    def on_event(event):
+        if event == SPEECH_START:
+            streamer.start()
+            if trace is not None:
+                trace.mark(ONSET)
+        elif event == SPEECH_CANCEL:
+            streamer.stop()
     
     try:
-        stream = audio_interface.open(format=FORMAT,
-                                      channels=CHANNELS,
-                                      rate=RATE,
-                                      input=True,
-                                      frames_per_buffer=CHUNK_SIZE)
-
-        triggered = False # Flag to indicate if speech has started
-
-        while True:
-            try:
-                # Read audio data in small chunks for real-time VAD
-                audio_chunk = stream.read(CHUNK_SIZE, exception_on_overflow=False)
-            except IOError as e:
-                # Handle input buffer overflow
-                if e.errno == pyaudio.paInputOverflowed:
-                    # print("Input overflowed. Continuing...") # Can print for debugging
-                    continue
-                else:
-                    raise
-
-            # Check if chunk is valid length before processing with VAD
-            # VAD expects 16-bit PCM, so each sample is 2 bytes
-            if len(audio_chunk) != CHUNK_SIZE * 2: 
-                # This can happen if stream.read returns less than expected, e.g., at end of input.
-                # Or if the microphone is disconnecting.
-                # print(f"Warning: Audio chunk size mismatch. Expected {CHUNK_SIZE*2}, got {len(audio_chunk)}")
-                continue
-
-            is_speech = vad.is_speech(audio_chunk, RATE)
-
-            if not triggered:
-                # Not yet triggered (waiting for speech to start)
-                ring_buffer.append((audio_chunk, is_speech))
-                num_voiced = len([f for f, speech in ring_buffer if speech])
-                
-                # If we have enough voiced frames in the buffer, speech has started
-                if num_voiced > 0.9 * ring_buffer.maxlen: # E.g., 90% of frames are speech
-                    triggered = True
-                    # Add buffered frames (that led to trigger) to voiced_frames
-                    for f, s in ring_buffer:
-                        voiced_frames.append(f)
-                    ring_buffer.clear() # Clear buffer as it's now part of actual speech
-                    print("Speech detected. Recording...")
-            else:
-                # Already triggered (speech is ongoing)
-                voiced_frames.append(audio_chunk)
-                ring_buffer.append((audio_chunk, is_speech))
-                num_unvoiced = len([f for f, speech in ring_buffer if not speech])
-                
-                # If we have enough unvoiced frames in the buffer, speech has ended
-                if num_unvoiced > 0.8 * ring_buffer.maxlen: # E.g., 80% of frames are silence
-                    print("Silence detected, stopping recording.")
-                    break
-
-        stream.stop_stream()
-        stream.close()
-
-        if not voiced_frames:
+        # The capture stream is opened once and keeps running between turns,
+        # so anything said while we were transcribing is already waiting in the ring.
+        if not record_utterance(source, segmenter, VAD_AGGRESSIVENESS, RATE, on_event=on_event):
             print("No speech recorded.")
             return "None"
 
-        # Combine all recorded speech frames
-        audio_data_bytes = b''.join(voiced_frames)
-        # Convert to float32 for Faster Whisper
-        audio_np = np.frombuffer(audio_data_bytes, dtype=np.int16).flatten().astype(np.float32) / 32768.0
-
-        print("Transcribing (instant!)...")
-        segments, info = model.transcribe(audio_np, beam_size=5)
-
-        recognized_text = ""
-        for segment in segments:
-            recognized_text += segment.text + " "
-        
-        if recognized_text.strip():
-            print(f"User said: {recognized_text.strip()}\n")
-            return recognized_text.strip().lower()
-        else:
-            print("Could not understand the audio. Please try again (VAD detected speech, but Whisper got no text).")
-            return "None"
+        # Frames were already converted to float32 as they arrived, Whisper reads a view of the buffer.
+        # Everything after the last voiced frame is endpoint silence, a partial that saw up to there is final.
+        speech_end = len(utterance) - endpointer.silence_frames * CHUNK_SIZE
+        if trace is not None:
+            trace.mark(ENDPOINT)
+            trace.mark(TRANSCRIBE_START, audio_s=round(utterance.duration(RATE), 2))
+        transcribe_start = time.time()
+        streamer.stop()
+        # Known short commands are answered by the fast path, everything else gets the full transcript
+        recognized_text = spotter.spot(streamer.model, utterance.view()[:speech_end], streamer.covered_segments(speech_end))
+        if recognized_text is None:
+            decode_start = time.time()
+            recognized_text = streamer.finish(speech_end)
+            spotter.record_open(time.time() - decode_start, utterance.view()[:speech_end])
+        if trace is not None:
+            trace.mark(TRANSCRIBE_END, rtf=round((time.time() - transcribe_start) / max(utterance.duration(RATE), 1e-3), 4))
+        time_baseline(utterance.view())
+        return report_transcript(recognized_text)
 
     except Exception as e:
         print(f"An error occurred: {e}")
-        # Ensure stream is closed in case of error
-        if stream and stream.is_active():
-            stream.stop_stream()
-            stream.close()
         return "None"
+    finally:
+        streamer.stop() # The next turn resets the buffer, no decode may still be reading it
+        if trace is not None:
+            trace.close()
+
+def transcribe_audio(audio_np):
+    print("Transcribing (instant!)...")
+    recognized_text = spotter.spot(model, audio_np)
+    if recognized_text is None:
+        decode_start = time.time()
+        recognized_text = timed_decode(decode_policy, model, audio_np, decode_stats, rate=RATE)
+        spotter.record_open(time.time() - decode_start, audio_np)
+    time_baseline(audio_np)
+    return report_transcript(recognized_text)
+
+def report_transcript(recognized_text):
+    if recognized_text.strip():
+        print(f"User said: {recognized_text.strip()}\n")
+        return recognized_text.strip().lower()
+    else:
+        print("Could not understand the audio. Please try again (VAD detected speech, but Whisper got no text).")
+        return "None"
+
+def transcribe_file_batch(source):
+    # Offline path: segment the whole recording at once with the vectorized VAD
+    # (same timeline as the live loop), then transcribe each utterance slice.
+    # The live segmenter is reused in timeline-only mode, so onset/endpoint settings are identical
+    segments, _, _ = batch_vad.segment_pcm(source.samples, rate=RATE, frame_size=CHUNK_SIZE,
+                                           aggressiveness=VAD_AGGRESSIVENESS, segmenter=segmenter)
+    for start, end in segments:
+        audio_np = source.samples[start * CHUNK_SIZE:end * CHUNK_SIZE].astype(np.float32) / 32768.0
+        query = transcribe_audio(audio_np)
+        if query != "None":
+            print(f"Processed query: {query}")
+
+def replay_files(paths, realtime=False):
+    # Runs every recording through the full VAD + Whisper pipeline, as fast as the CPU allows unless realtime
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(('.wav', '.raw', '.pcm', '.s16')))
+        else:
+            files.append(path)
+
+    total_audio = 0.0
+    total_start = time.time()
+    for path in files:
+        source = open_source(path, rate=RATE, frame_size=CHUNK_SIZE, realtime=realtime)
+        print(f"--- {path} ---")
+        file_start = time.time()
+        if not realtime and hasattr(source, "samples"):
+            transcribe_file_batch(source)
+        else:
+            while not source.finished:
+                query = takeCommand_natural_convo(source)
+                if query != "None":
+                    print(f"Processed query: {query}")
+        file_time = time.time() - file_start
+        if hasattr(source, "duration"):
+            total_audio += source.duration()
+            print(f"File done in {file_time:.3f} seconds ({source.duration():.2f} s of audio)\n")
+        source.close()
+
+    total_time = time.time() - total_start
+    if total_audio:
+        print(f"Replayed {len(files)} file(s), {total_audio:.1f} s of audio in {total_time:.2f} s "
+              f"(real-time factor {total_time / total_audio:.3f})")
+    print(decode_stats.summary(baseline_seconds if measure_baseline else None))
+    print(spotter.report())
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Natural conversation speech recognition.")
+    parser.add_argument("-i", "--input", nargs="+",
+                        help="WAV/raw PCM files or directories to replay instead of the microphone, '-' for stdin")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Pace file input like a live microphone instead of running as fast as possible")
+    parser.add_argument("--baseline", action="store_true",
+                        help="Also time a fixed beam_size=5 decode of every turn to report the CPU saved")
+    args = parser.parse_args()
+    measure_baseline = args.baseline
+    load_model()
+    init_tracing()
+
+    if args.input and args.input != ["-"]:
+        replay_files(args.input, realtime=args.realtime)
+        sys.exit(0)
+
+    source = open_source("-") if args.input == ["-"] else get_microphone()
     print("Natural Conversation Speech recognition module started. Say 'exit' to quit.")
     print(f"Current time: {time.strftime('%I:%M:%S %p IST')}")
     while True:
         start_time = time.time()
-        query = takeCommand_natural_convo()
+        query = takeCommand_natural_convo(source)
         end_time = time.time()
 
         if query != "None":
             print(f"Processed query: {query}")
             print(f"Total time for turn: {end_time - start_time:.3f} seconds\n")
             
-        if query == "exit":
+        if query == "exit" or source.finished:
             print("Exiting...")
             break
 
-    audio_interface.terminate() # Clean up PyAudio resources on exit
\ No newline at end of file
+    source.close()
+    if mic is not None:
+        mic.audio_interface.terminate() # Clean up PyAudio resources on exit
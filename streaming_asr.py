@@ -0,0 +1,128 @@
+import threading
+from adaptive_decode import DecodePolicy, decode_segments, segments_text, timed_decode
+
+# --- Streaming (partial) Transcription ---
+# While the user is still talking, the growing utterance buffer is re-decoded every
+# INTERVAL_MS with a cheap greedy pass. Words that two consecutive hypotheses agree on
+# (LocalAgreement-2) are committed and never change again. If the last partial decode
+# already covered all of the speech by the time the endpointer fires, it *is* the final
+# transcript, so the decode happens during the endpoint hangover instead of after it
+# (unless the adaptive decode policy finds it unreliable and falls back to beam search).
+
+RATE = 16000
+INTERVAL_MS = 400       # How often to re-decode the growing buffer
+MIN_AUDIO_MS = 300      # Don't bother decoding less audio than this
+PARTIAL_BEAM_SIZE = 1   # Greedy for partials, they get redone every INTERVAL_MS anyway
+
+
+def _words(text):
+    return text.split()
+
+
+def _normalize(word):
+    return word.lower().strip(".,!?;:\"'")
+
+
+def transcribe_text(model, audio_np, beam_size):
+    return segments_text(decode_segments(model, audio_np, beam_size))
+
+
+class StreamingTranscriber:
+    def __init__(self, model, utterance, interval_ms=INTERVAL_MS, min_audio_ms=MIN_AUDIO_MS,
+                 beam_size=PARTIAL_BEAM_SIZE, on_partial=None, rate=RATE, policy=None, stats=None):
+        self.model = model
+        self.utterance = utterance
+        self.interval = interval_ms / 1000.0
+        self.min_samples = int(min_audio_ms * rate / 1000)
+        self.beam_size = beam_size
+        self.on_partial = on_partial
+        self.rate = rate
+        self.policy = policy or DecodePolicy()
+        self.stats = stats # adaptive_decode.DecodeStats, records the final decode of every turn
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.committed = []          # Words both of the last two hypotheses agreed on
+        self.previous = []           # Last hypothesis, split into words
+        self.last_text = ""          # Full text of the last hypothesis
+        self.last_samples = 0        # How much audio the last hypothesis was decoded from
+        self.last_segments = None    # Its segments, for the confidence check at endpoint
+        self.decodes = 0
+
+    def start(self):
+        # Called on SPEECH_START, runs until stop(). Doesn't block: a previous stream is only
+        # cancelled, the new thread waits for its in-flight decode before decoding itself
+        previous = self.thread
+        self.cancel()
+        self.stop_event = threading.Event() # Each stream has its own, a cancelled one can't stop or feed this one
+        with self.lock:
+            self._clear()
+        self.thread = threading.Thread(target=self._run, args=(self.stop_event, previous), daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        # Ends the stream without waiting for it (safe on the event loop), stop() or start() joins later
+        self.stop_event.set()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join() # Waits for an in-flight decode, its result may be the final transcript
+            self.thread = None
+
+    def _run(self, stop_event, previous):
+        if previous is not None:
+            previous.join() # One decode at a time
+        while not stop_event.wait(self.interval):
+            audio_np = self.utterance.snapshot()
+            if len(audio_np) < self.min_samples or len(audio_np) == self.last_samples:
+                continue
+            segments = decode_segments(self.model, audio_np, self.beam_size)
+            if stop_event.is_set() and len(self.utterance) < len(audio_np):
+                break # The utterance was dropped (too short) while we were decoding
+            self._agree(segments, len(audio_np), stop_event)
+
+    def _agree(self, segments, num_samples, stop_event):
+        text = segments_text(segments)
+        words = _words(text)
+        with self.lock:
+            if stop_event is not self.stop_event:
+                return # A newer stream has started since this decode began
+            changed = text != self.last_text
+            # LocalAgreement-2: extend the committed prefix by whatever this and the previous hypothesis share
+            k = len(self.committed)
+            while (k < len(words) and k < len(self.previous)
+                   and _normalize(words[k]) == _normalize(self.previous[k])):
+                k += 1
+            if k > len(self.committed) and all(_normalize(a) == _normalize(b)
+                                               for a, b in zip(self.committed, words)):
+                self.committed = words[:k]
+            self.previous = words
+            self.last_text = text
+            self.last_samples = num_samples
+            self.last_segments = segments
+            self.decodes += 1
+            partial = " ".join(self.committed + words[len(self.committed):])
+        if self.on_partial and partial and changed:
+            self.on_partial(partial)
+
+    def covered_segments(self, speech_end_sample):
+        # The last partial's (greedy) segments if that decode already saw all the speech, else None
+        if (self.last_segments is not None and self.last_samples >= speech_end_sample
+                and self.beam_size == self.policy.greedy_beam_size):
+            return self.last_segments
+        return None
+
+    def finish(self, speech_end_sample):
+        """
+        Stops streaming and returns the final transcript. If the last partial decode
+        already saw all audio up to `speech_end_sample` (the end of the last voiced frame)
+        and passes the decode policy's confidence check, its text is used as is; otherwise
+        the whole utterance is decoded again (greedy first, beam search if needed).
+        """
+        self.stop()
+        return timed_decode(self.policy, self.model, self.utterance.view(), self.stats,
+                            self.covered_segments(speech_end_sample), self.rate)
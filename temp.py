@@ -3,7 +3,6 @@
 import pygame
 import threading
 import time
-import speech_recognition as sr
 import math
 import random
 import tkinter as tk
@@ -76,6 +75,7 @@ class VoiceAssistantGUI:
     def take_command(self):
         self.status_label.config(text="Listening...")
 
+        import speech_recognition as sr # Imported on the first command, not when the window opens
         r = sr.Recognizer()
         with sr.Microphone() as source:
             r.adjust_for_ambient_noise(source, duration=0.5)
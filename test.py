@@ -1,7 +1,8 @@
 import time
 import pyaudio
 import numpy as np
-from faster_whisper import WhisperModel
+from model_loader import ModelLoader
+from autotune import load_profile
 import webrtcvad
 import collections
 import sys
@@ -10,16 +11,26 @@ import sys
 MODEL_SIZE = "tiny.en" # 'tiny.en', 'base.en', 'small.en', 'medium.en' etc.
 DEVICE = "cpu"        # 'cpu' or 'cuda' (if you have an NVIDIA GPU)
 COMPUTE_TYPE = "int8" # 'int8' for CPU (faster), 'float16' for GPU (better accuracy, higher VRAM)
+CPU_THREADS = 0       # CTranslate2 threads, 0 = automatic
+NUM_WORKERS = 1       # Concurrent decodes the model can run
+# `python autotune.py <clips>` benchmarks this machine and saves a profile that overrides the values above
+asr_settings = load_profile(dict(model_size=MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE,
+                                 cpu_threads=CPU_THREADS, num_workers=NUM_WORKERS))
 
-# Load the Faster Whisper model once at the start
-print(f"Loading Faster Whisper model: {MODEL_SIZE} on {DEVICE} with {COMPUTE_TYPE} compute type...")
-try:
-    model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
-    print("Model loaded successfully.")
-except Exception as e:
-    print(f"Error loading Whisper model: {e}")
-    print("Ensure you have `ffmpeg` installed and your `DEVICE` and `COMPUTE_TYPE` are compatible.")
-    sys.exit(1) # Exit if model loading fails
+USE_ASR_SERVICE = True # Share one model per machine through asr_service.py (started on first use)
+
+# Loaded once by load_model() when run as a script: a client of the shared ASR service, or a local WhisperModel as fallback
+model = None
+
+def load_model():
+    global model
+    print(f"Loading Faster Whisper model: {asr_settings['model_size']} on {asr_settings['device']} "
+          f"with {asr_settings['compute_type']} compute type...")
+    try:
+        model = ModelLoader(**asr_settings,
+                            use_service=USE_ASR_SERVICE).start().result()
+    except Exception:
+        sys.exit(1) # Exit if model loading fails, ModelLoader already printed why
 
 # --- PyAudio & VAD Configuration ---
 FORMAT = pyaudio.paInt16
@@ -37,7 +48,7 @@ VAD_AGGRESSIVENESS = 3 # 0 (least aggressive) to 3 (most aggressive)
 # Mode 3: Most aggressive on non-speech. Useful for noisy environments to cut out noise.
 # If you miss soft speech, try 0 or 1.
 
-audio_interface = pyaudio.PyAudio()
+audio_interface = None # PyAudio() opens the host's audio system, so only when run as a script
 
 def takeCommand_natural_convo():
     print("Listening (speak naturally)...")
@@ -140,6 +151,8 @@ def takeCommand_natural_convo():
         return "None"
 
 if __name__ == "__main__":
+    load_model()
+    audio_interface = pyaudio.PyAudio()
     print("Natural Conversation Speech recognition module started. Say 'exit' to quit.")
     print(f"Current time: {time.strftime('%I:%M:%S %p IST')}")
     while True:
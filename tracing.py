@@ -0,0 +1,166 @@
+# Per-turn latency tracing
+#
+#   python tracing.py                       # p50/p95/p99 per stage over ~/.sagi/traces/turns.jsonl*
+#   python tracing.py my_traces.jsonl --last 200
+#
+# Every turn records the time of its milestones (onset, endpoint, transcription start/end,
+# intent, TTS start, first audio, TTS end) relative to the start of listening, plus a few
+# fields (audio length, RTF, intent...). A finished turn is one JSON line in a rotating
+# trace file; the report turns consecutive milestones into stage durations.
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import logging
+from logging.handlers import RotatingFileHandler
+
+TRACE_DIR = os.path.join(os.path.expanduser("~"), ".sagi", "traces")
+TRACE_PATH = os.path.join(TRACE_DIR, "turns.jsonl")
+MAX_BYTES = 5 * 1024 * 1024 # Per file, then turns.jsonl.1, .2, ...
+BACKUP_COUNT = 3
+
+# Milestones in the order they happen in a turn
+ONSET = "onset"
+ENDPOINT = "endpoint"
+TRANSCRIBE_START = "transcribe_start"
+TRANSCRIBE_END = "transcribe_end"
+INTENT = "intent"
+TTS_START = "tts_start"
+FIRST_AUDIO = "first_audio"
+TTS_END = "tts_end"
+
+# (stage, from milestone, to milestone) for the report
+STAGES = (
+    ("speech (onset -> endpoint)", ONSET, ENDPOINT),
+    ("endpoint -> ASR start", ENDPOINT, TRANSCRIBE_START),
+    ("ASR", TRANSCRIBE_START, TRANSCRIBE_END),
+    ("intent", TRANSCRIBE_END, INTENT),
+    ("TTS queue", INTENT, TTS_START),
+    ("TTS first audio", TTS_START, FIRST_AUDIO),
+    ("TTS playback", FIRST_AUDIO, TTS_END),
+    ("endpoint -> first audio", ENDPOINT, FIRST_AUDIO), # What the user waits for
+)
+
+
+class TurnTrace:
+    """
+    Milestones of one turn. mark() may be called from any thread (segmenter, ASR executor,
+    TTS worker); close() writes the turn once, later calls do nothing.
+    """
+
+    def __init__(self, tracer, turn, **fields):
+        self.tracer = tracer
+        self.start = time.monotonic()
+        self.record = {"turn": turn, "started": time.strftime("%Y-%m-%dT%H:%M:%S"), **fields, "marks": {}}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def mark(self, milestone, **fields):
+        with self.lock:
+            self.record["marks"][milestone] = round(1000 * (time.monotonic() - self.start), 1)
+            self.record.update(fields)
+
+    def set(self, **fields):
+        with self.lock:
+            self.record.update(fields)
+
+    def close(self, **fields):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.record.update(fields)
+            line = json.dumps(self.record)
+        self.tracer.write(line)
+
+
+class Tracer:
+    def __init__(self, path=TRACE_PATH, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, source="main"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.source = source
+        self.turns = 0
+        # logging's handler does the size-based rotation and serializes writers from several threads
+        self.logger = logging.getLogger(f"sagi.trace.{path}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def begin_turn(self, **fields):
+        self.turns += 1
+        return TurnTrace(self, self.turns, source=self.source, **fields)
+
+    def write(self, line):
+        self.logger.info(line)
+
+
+def trace_files(path):
+    # Oldest rotation first, so --last sees the most recent turns
+    rotated = []
+    number = 1
+    while os.path.exists(f"{path}.{number}"):
+        rotated.append(f"{path}.{number}")
+        number += 1
+    return list(reversed(rotated)) + ([path] if os.path.exists(path) else [])
+
+
+def load_turns(path):
+    turns = []
+    for name in trace_files(path):
+        with open(name) as trace:
+            for line in trace:
+                try:
+                    turns.append(json.loads(line))
+                except ValueError:
+                    continue # A line cut short by a crash
+    return turns
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def report(turns):
+    lines = [f"{len(turns)} turn(s)", "",
+             f"{'stage':<28} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for stage, begin, end in STAGES:
+        durations = [turn["marks"][end] - turn["marks"][begin] for turn in turns
+                     if begin in turn.get("marks", {}) and end in turn.get("marks", {})]
+        if not durations:
+            lines.append(f"{stage:<28} {0:>5} {'-':>9} {'-':>9} {'-':>9}")
+            continue
+        lines.append(f"{stage:<28} {len(durations):>5} {percentile(durations, 0.5):>9.0f} "
+                     f"{percentile(durations, 0.95):>9.0f} {percentile(durations, 0.99):>9.0f}")
+    rtfs = [turn["rtf"] for turn in turns if turn.get("rtf") is not None]
+    if rtfs:
+        lines.append(f"\nASR real-time factor: p50 {percentile(rtfs, 0.5):.3f}, p95 {percentile(rtfs, 0.95):.3f}, "
+                     f"p99 {percentile(rtfs, 0.99):.3f}")
+    cancelled = sum(1 for turn in turns if turn.get("tts_cancelled"))
+    if cancelled:
+        lines.append(f"{cancelled} reply(ies) cancelled by barge-in")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from the turn trace.")
+    parser.add_argument("path", nargs="?", default=TRACE_PATH, help="Trace file (rotated siblings are included)")
+    parser.add_argument("--last", type=int, help="Only the most recent N turns")
+    parser.add_argument("--source", help="Only turns from this program (main, speechreg)")
+    args = parser.parse_args()
+
+    turns = load_turns(args.path)
+    if args.source:
+        turns = [turn for turn in turns if turn.get("source") == args.source]
+    if args.last:
+        turns = turns[-args.last:]
+    if not turns:
+        print(f"No traced turns in {args.path}")
+        sys.exit(1)
+    print(report(turns))
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import subprocess
+
+# --- Pre-synthesized TTS Cache ---
+# Nearly every reply is one of a fixed set of phrases, yet pyttsx3 synthesized each one live.
+# At startup a background process renders the known phrases to WAV with save_to_file (its
+# own pyttsx3 engine, the live one isn't thread-safe); cached replies are then played
+# straight from disk. Files are content-addressed (hash of voice settings + text), so a
+# changed voice or rate never plays stale audio, and the oldest-used files are evicted once
+# the cache grows past MAX_BYTES (checked at startup by prerender() and after every render).
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".sagi", "tts_cache")
+MAX_BYTES = 64 * 1024 * 1024
+RATE = 170
+VOLUME = 0.9
+
+
+class TTSCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES, rate=RATE, volume=VOLUME, voice=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.rate = rate
+        self.volume = volume
+        self.voice = voice # None = the engine's default voice
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text):
+        settings = json.dumps([self.voice, self.rate, self.volume, text.strip()])
+        return hashlib.sha256(settings.encode("utf-8")).hexdigest()
+
+    def path(self, text):
+        return os.path.join(self.cache_dir, self.key(text) + ".wav")
+
+    def lookup(self, text):
+        """Path of the cached audio for `text`, or None. A hit counts as a use for eviction."""
+        path = self.path(text)
+        try:
+            os.utime(path) # Most recently used
+        except FileNotFoundError: # Never rendered, or just evicted by another process
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def missing(self, phrases):
+        return [text for text in dict.fromkeys(phrases) if not os.path.exists(self.path(text))]
+
+    def evict(self):
+        # Drop the least recently used files until the cache fits in max_bytes. The background
+        # renderer evicts from the same directory, so a file can vanish under us: it's gone already.
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".wav") and not name.startswith("."): # Skip files still being rendered
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def render(self, engine, text, persist=True):
+        """
+        Synthesizes `text` into the cache with `engine` (pyttsx3) and returns its path, or None.
+        With persist=False (one-off sentences like the current time) it goes to a temporary
+        file outside the cache instead, which the caller deletes after playing it.
+        """
+        final = self.path(text)
+        if persist:
+            handle, partial = tempfile.mkstemp(suffix=".wav", dir=self.cache_dir, prefix=".rendering-")
+        else:
+            handle, partial = tempfile.mkstemp(suffix=".wav", prefix="sagi-tts-")
+        os.close(handle)
+        engine.save_to_file(text, partial)
+        engine.runAndWait()
+        if not os.path.getsize(partial):
+            os.remove(partial)
+            return None
+        if not persist:
+            return partial
+        os.replace(partial, final) # A reader never sees a half-written file
+        self.evict()
+        return final
+
+    def prerender(self, phrases):
+        """
+        Starts a background process rendering the phrases that aren't cached yet.
+        Returns the Popen (or None if everything is cached already).
+        """
+        self.evict() # Also when nothing needs rendering, live renders may have grown the cache since
+        todo = self.missing(phrases)
+        if not todo:
+            return None
+        request = {"cache_dir": self.cache_dir, "max_bytes": self.max_bytes, "rate": self.rate,
+                   "volume": self.volume, "voice": self.voice, "phrases": todo}
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__)], stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, text=True)
+        process.stdin.write(json.dumps(request))
+        process.stdin.close()
+        print(f"TTS cache: rendering {len(todo)} phrase(s) in the background.")
+        return process
+
+    def report(self):
+        return f"TTS cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+
+def _render_main():
+    # Background renderer: one pyttsx3 engine of its own
+    import pyttsx3
+    request = json.loads(sys.stdin.read())
+    cache = TTSCache(request["cache_dir"], request["max_bytes"], request["rate"], request["volume"], request["voice"])
+    engine = pyttsx3.init()
+    engine.setProperty('rate', cache.rate)
+    engine.setProperty('volume', cache.volume)
+    if cache.voice:
+        engine.setProperty('voice', cache.voice)
+    for text in request["phrases"]:
+        cache.render(engine, text)
+
+
+if __name__ == "__main__":
+    _render_main()
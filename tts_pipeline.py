@@ -0,0 +1,291 @@
+import os
+import re
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import TTS_START, FIRST_AUDIO, TTS_END
+
+# --- Sentence-Streaming TTS ---
+# Replies are split into sentences (long ones further into clauses). The thread that owns
+# the engine (the TTS worker) renders chunk after chunk into the TTS cache while one
+# long-lived player thread plays the chunk before, so the first sentence is heard after one
+# short synthesis instead of the whole reply. Chunks are cached individually, which also lets fixed sentences inside templated
+# replies (like the startup greeting) come straight from the cache. Only the chunks in
+# `cacheable` are kept; one-off ones ("The current time is 02:21 PM.") are rendered to a
+# temporary file and deleted once played, so the cache doesn't grow by a file a minute.
+
+MAX_CHUNK_CHARS = 120 # Longer sentences are split at , ; :
+MIN_CHUNK_CHARS = 25  # ...but not into clauses shorter than this
+
+_sentence_end = re.compile(r'(?<=[.!?])\s+')
+_clause_end = re.compile(r'(?<=[,;:])\s+')
+
+
+def split_sentences(text):
+    chunks = []
+    for sentence in _sentence_end.split(text.strip()):
+        if len(sentence) <= MAX_CHUNK_CHARS:
+            chunks.append(sentence)
+            continue
+        clause = ""
+        for part in _clause_end.split(sentence):
+            clause = f"{clause} {part}" if clause else part
+            if len(clause) >= MIN_CHUNK_CHARS:
+                chunks.append(clause)
+                clause = ""
+        if clause:
+            if chunks and len(clause) < MIN_CHUNK_CHARS:
+                chunks[-1] += " " + clause # Short tail joins the clause before it
+            else:
+                chunks.append(clause)
+    return [chunk for chunk in chunks if chunk]
+
+
+class TTSPipeline:
+    """
+    speak(text, cancel) blocks until the reply has been played or `cancel` (an Event) is
+    set. `engine` is the pyttsx3 engine, only ever driven from the thread calling speak()
+    (TTSWorker creates it on its own thread and sets it here),
+    `cache` a tts_cache.TTSCache and `play(path, cancel, started)` plays a WAV file to
+    completion or until cancel is set, calling started() once the audio is actually out,
+    and returns False if it couldn't play it. `cacheable` holds the
+    chunks worth keeping in the cache (None keeps every chunk). `live` is set while the
+    engine speaks live, with no file an echo gate could compare the mic against.
+    """
+
+    def __init__(self, engine, cache=None, play=None, cacheable=None):
+        self.engine = None
+        self.live = threading.Event()
+        self.live_cancel = None # The cancel Event of the sentence being spoken live
+        self.use_engine(engine)
+        self.cache = cache
+        self.play = play
+        self.cacheable = None if cacheable is None else {chunk.strip() for chunk in cacheable}
+        # Plays one chunk while the next is synthesized; its single thread is reused by every reply
+        self.player = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-play")
+        self.turns = [] # (time to first audio, chunks, cached chunks, total seconds)
+        # The reply being spoken, for the first-audio timestamp (taken by whichever chunk starts first)
+        self.reply_start = None
+        self.reply_trace = None
+        self.first_audio = None
+
+    def use_engine(self, engine):
+        self.engine = engine
+        if engine is not None:
+            engine.connect('started-word', self._on_word)
+            engine.connect('started-utterance', self._on_utterance)
+
+    def _audio_started(self, cached=False):
+        # First sound of the reply: a file the player started, or the engine starting to talk
+        if self.reply_start is None or self.first_audio is not None:
+            return
+        self.first_audio = time.time() - self.reply_start
+        if self.reply_trace is not None:
+            self.reply_trace.mark(FIRST_AUDIO, first_cached=cached)
+
+    def _on_utterance(self, name):
+        if self.live.is_set(): # Not for save_to_file renders, they aren't heard
+            self._audio_started()
+
+    def _on_word(self, name, location, length):
+        # pyttsx3 calls this inside runAndWait, on the engine's own thread: cancel stops live speech mid-sentence
+        if self.live_cancel is not None and self.live_cancel.is_set():
+            self.engine.stop()
+
+    def _say(self, text, cancel=None):
+        if not self.engine or (cancel is not None and cancel.is_set()):
+            return
+        self.live_cancel = cancel
+        self.live.set()
+        try:
+            self.engine.say(text)
+            self.engine.runAndWait()
+        finally:
+            self.live.clear()
+            self.live_cancel = None
+
+    def speak(self, text, cancel=None, trace=None):
+        # `trace` (tracing.TurnTrace) gets the TTS start / first audio / end milestones
+        start = time.time()
+        chunks = split_sentences(text)
+        cancel = cancel or threading.Event()
+        if not chunks:
+            return
+        if trace is not None:
+            trace.mark(TTS_START, chunks=len(chunks))
+        self.reply_start, self.reply_trace, self.first_audio = start, trace, None
+        if self.cache is None or self.play is None:
+            # Nothing to render into: still one sentence at a time, so the first is heard sooner
+            for chunk in chunks:
+                if cancel.is_set():
+                    break
+                self._say(chunk, cancel)
+            self._finish(trace, cancel, start, len(chunks), 0)
+            return
+
+        cached_chunks = 0
+        playing = None # (chunk, path, one_off, Future of play()) of the chunk the player has
+        for chunk in chunks:
+            if cancel.is_set():
+                break
+            # Synthesized here, on the engine's thread, while the player plays the chunk before
+            path = self.cache.lookup(chunk)
+            cached = path is not None
+            one_off = False
+            if path is None and self.engine:
+                one_off = self.cacheable is not None and chunk.strip() not in self.cacheable
+                path = self.cache.render(self.engine, chunk, persist=not one_off)
+            self._played(playing, cancel)
+            playing = None
+            if cancel.is_set():
+                self._discard(path, one_off)
+                break
+            cached_chunks += cached
+            started = lambda cached=cached: self._audio_started(cached)
+            playing = (chunk, path, one_off, self.player.submit(self.play, path, cancel, started) if path else None)
+        self._played(playing, cancel)
+        self._finish(trace, cancel, start, len(chunks), cached_chunks)
+
+    def _played(self, playing, cancel):
+        # Waits for the player; a chunk it couldn't play (or that never got a file) is spoken live
+        if playing is None:
+            return
+        chunk, path, one_off, future = playing
+        try:
+            if future is None or not future.result():
+                self._say(chunk, cancel)
+        finally:
+            self._discard(path, one_off)
+
+    def _discard(self, path, one_off):
+        if one_off and path is not None:
+            os.remove(path)
+
+    def _finish(self, trace, cancel, start, chunks, cached):
+        first_audio = self.first_audio
+        self.reply_start = self.reply_trace = None
+        if trace is not None:
+            trace.mark(TTS_END, tts_cancelled=cancel.is_set())
+        if cancel.is_set():
+            print(f"TTS: reply cancelled after {time.time() - start:.2f} s")
+            return
+        if first_audio is None:
+            print("TTS: nothing could be played (no engine, no cached audio)")
+            return
+        self._record(first_audio, chunks, cached, time.time() - start)
+
+    def _record(self, first_audio, chunks, cached, total):
+        self.turns.append((first_audio, chunks, cached, total))
+        print(f"TTS: first audio after {1000 * first_audio:.0f} ms ({chunks} chunk(s), {cached} cached, "
+              f"{total:.2f} s total)")
+
+    def report(self):
+        if not self.turns:
+            return "TTS: no replies."
+        first = sorted(turn[0] for turn in self.turns)
+        return (f"TTS: {len(self.turns)} replies, time to first audio median {1000 * first[len(first) // 2]:.0f} ms, "
+                f"max {1000 * first[-1]:.0f} ms")
+
+
+# --- Speech Worker ---
+# A single thread owns the pipeline and the engine: make_engine() is called on it, since
+# pyttsx3 drivers (SAPI5's COM objects in particular) belong to the thread that made them.
+# Replies used to get a new thread each, which could talk over each other and raced on one
+# shared "done speaking" event; now they queue, can be flushed or cancelled mid-reply, and
+# listeners wait on one event.
+
+PRIORITY_HIGH = 0   # Jumps ahead of queued replies (not of the one playing)
+PRIORITY_NORMAL = 1
+
+
+class TTSWorker:
+    """
+    The one thread that speaks. Replies are queued by priority (then arrival) and played
+    one after another through a TTSPipeline. `speaking` is set while a reply plays and
+    `finished` while there is nothing queued or playing; listeners wait on `finished`.
+    `make_engine()` returns the pyttsx3 engine (or None), `ready` is set once it ran.
+    """
+
+    def __init__(self, pipeline, make_engine=None):
+        self.pipeline = pipeline
+        self.make_engine = make_engine
+        self.ready = threading.Event()
+        self.queue = queue.PriorityQueue()
+        self.speaking = threading.Event()
+        self.finished = threading.Event()
+        self.finished.set()
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = 0     # Queued + playing
+        self.sequence = 0    # Keeps FIFO order within a priority
+        self.generation = 0  # Bumped by cancel(), stale queue entries are skipped
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def say(self, text, priority=PRIORITY_NORMAL, trace=None):
+        # `trace` (tracing.TurnTrace) is the turn this reply answers, closed once it is spoken or dropped
+        with self.lock:
+            self.pending += 1
+            self.sequence += 1
+            self.finished.clear() # Before the put, so nobody sees "finished" between say() and playback
+            self.queue.put((priority, self.sequence, self.generation, text, trace))
+
+    def flush(self):
+        # Drops everything queued, the current reply keeps playing
+        with self.lock:
+            while True:
+                try:
+                    trace = self.queue.get_nowait()[4]
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                if trace is not None:
+                    trace.close(tts_dropped=True)
+            if not self.pending:
+                self.finished.set()
+
+    def cancel(self):
+        # Drops everything queued and stops the current reply (within one playback poll)
+        with self.lock:
+            self.generation += 1
+            self.cancel_event.set()
+        self.flush()
+
+    def stop(self):
+        self.cancel()
+        self.queue.put((-1, 0, None, None, None))
+        self.thread.join(timeout=2)
+
+    def _run(self):
+        if self.make_engine is not None:
+            try:
+                self.pipeline.use_engine(self.make_engine())
+            except Exception as e:
+                print(f"TTS engine error: {e}")
+        self.ready.set()
+        while True:
+            priority, _, generation, text, trace = self.queue.get()
+            if text is None:
+                break
+            with self.lock:
+                stale = generation != self.generation
+                if not stale:
+                    self.cancel_event.clear()
+            if not stale:
+                self.speaking.set()
+                try:
+                    self.pipeline.speak(text, self.cancel_event, trace)
+                except Exception as e:
+                    print(f"TTS error: {e}")
+                self.speaking.clear()
+            if trace is not None:
+                trace.close(tts_dropped=stale)
+            with self.lock:
+                self.pending -= 1
+                if not self.pending:
+                    self.finished.set()
+        if self.pipeline.engine:
+            self.pipeline.engine.stop() # On the thread that owns it
+        self.pipeline.player.shutdown(wait=False)
@@ -0,0 +1,57 @@
+import numpy as np
+
+INITIAL_SECONDS = 15 # Covers almost every command without ever growing
+RATE = 16000
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+class UtteranceBuffer:
+    """
+    Growable, preallocated float32 buffer for one utterance. Each int16 frame is
+    scaled straight into place as it arrives, so at endpoint Whisper gets a view
+    of the buffer instead of the join/frombuffer/astype copies.
+    """
+
+    def __init__(self, initial_seconds=INITIAL_SECONDS, rate=RATE):
+        self.data = np.empty(int(initial_seconds * rate), dtype=np.float32)
+        self.length = 0
+
+    def append(self, frame):
+        # frame is an int16 array (e.g. a view into the capture ring)
+        end = self.length + len(frame)
+        if end > len(self.data):
+            self._grow(end)
+        np.multiply(frame, INT16_SCALE, out=self.data[self.length:end], casting='unsafe')
+        self.length = end
+
+    def _grow(self, needed):
+        # Double the capacity so long utterances only reallocate a handful of times
+        capacity = max(len(self.data) * 2, 1)
+        while capacity < needed:
+            capacity *= 2
+        grown = np.empty(capacity, dtype=np.float32)
+        grown[:self.length] = self.data[:self.length]
+        self.data = grown
+
+    def view(self):
+        """Zero-copy view of the samples recorded so far. Valid until reset()."""
+        return self.data[:self.length]
+
+    def snapshot(self):
+        # Same as view(), but safe to call from another thread while frames are appended:
+        # if the buffer grew between reading `data` and `length`, read both again
+        while True:
+            data = self.data
+            length = self.length
+            if data is self.data:
+                return data[:length]
+
+    def duration(self, rate=RATE):
+        return self.length / rate
+
+    def reset(self):
+        # Keep the allocation for the next turn, just forget the samples
+        self.length = 0
+
+    def __len__(self):
+        return self.length